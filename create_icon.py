@@ -1,5 +1,9 @@
-import sys
-from PIL import Image, ImageDraw
+import io
+import struct
+from functools import lru_cache
+
+# Pillow импортируется только при отрисовке: константы и разбор аргументов
+# модуля доступны без загрузки PIL
 
 # Словарь цветов
 COLORS = {
@@ -35,28 +39,61 @@ SHAPES = {
     "треугольник": draw_triangle,
 }
 
+# Размер, в котором фигуры рисуются; меньшие маски получаются уменьшением
+MASK_SIZE = 256
+
+@lru_cache(maxsize=None)
+def shape_mask(shape, size, padding_ratio):
+    """Маска фигуры (режим "L") для заданного размера; строится один раз."""
+    from PIL import Image, ImageDraw
+    
+    if size < MASK_SIZE:
+        # Уменьшаем готовую большую маску вместо повторной отрисовки
+        return shape_mask(shape, MASK_SIZE, padding_ratio).resize(
+            (size, size), Image.Resampling.LANCZOS
+        )
+    mask = Image.new("L", (size, size), 0)
+    padding = int(size * padding_ratio)
+    coords = [padding, padding, size - padding, size - padding]
+    SHAPES[shape](ImageDraw.Draw(mask), coords, 255)
+    return mask
+
 def draw_icon(size, bg_shape, bg_color, fg_shape, fg_color):
     """Рисует иконку с заданными фигурами и цветами."""
+    from PIL import Image
+    
     # Создаем изображение с белым фоном
     img = Image.new("RGB", (size, size), (255, 255, 255))
-    draw = ImageDraw.Draw(img)
-    
-    # Координаты для фоновой фигуры (весь размер с небольшим отступом)
-    bg_padding = int(size * 0.02)
-    bg_coords = [bg_padding, bg_padding, size - bg_padding, size - bg_padding]
+    box = (0, 0, size, size)
     
-    # Рисуем фоновую фигуру
-    SHAPES[bg_shape](draw, bg_coords, COLORS[bg_color])
+    # Фоновая фигура (весь размер с небольшим отступом)
+    img.paste(COLORS[bg_color], box, shape_mask(bg_shape, size, 0.02))
     
-    # Координаты для фигуры на переднем плане (с отступом 20%)
-    fg_padding = int(size * 0.2)
-    fg_coords = [fg_padding, fg_padding, size - fg_padding, size - fg_padding]
-    
-    # Рисуем фигуру на переднем плане
-    SHAPES[fg_shape](draw, fg_coords, COLORS[fg_color])
+    # Фигура на переднем плане (с отступом 20%)
+    img.paste(COLORS[fg_color], box, shape_mask(fg_shape, size, 0.2))
     
     return img
 
+def pack_ico(images):
+    """Собирает ICO-файл из готовых изображений (PNG-данные без пересэмплирования)."""
+    header = struct.pack("<HHH", 0, 1, len(images))
+    offset = len(header) + 16 * len(images)
+    entries = []
+    payloads = []
+    for img in images:
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        data = buf.getvalue()
+        width, height = img.size
+        # Размер 256 кодируется в каталоге ICO как 0
+        entries.append(struct.pack(
+            "<BBBBHHII",
+            width % 256, height % 256, 0, 0, 1, 32, len(data), offset
+        ))
+        payloads.append(data)
+        offset += len(data)
+    return header + b"".join(entries) + b"".join(payloads)
+
 def select_option(prompt, options):
     """Выбор опции из списка."""
     print(f"\n{prompt}")
@@ -86,21 +123,26 @@ def print_usage():
     print("")
     print("Без аргументов - интерактивный режим")
 
-def parse_arg(arg, options):
-    """Преобразует аргумент в опцию."""
-    # Если это число
-    if arg.isdigit():
-        index = int(arg) - 1
-        if 0 <= index < len(options):
-            return options[index]
-    # Если это название
-    if arg.lower() in options:
-        return arg.lower()
-    return None
+def build_lookup(options):
+    """Таблица аргумент -> опция: номер ("1", "2", ...) или название."""
+    table = {str(i): option for i, option in enumerate(options, 1)}
+    table.update({option: option for option in options})
+    return table
+
+SHAPE_OPTIONS = ["круг", "квадрат", "треугольник"]
+COLOR_OPTIONS = ["синий", "красный", "желтый"]
+SHAPE_LOOKUP = build_lookup(SHAPE_OPTIONS)
+COLOR_LOOKUP = build_lookup(COLOR_OPTIONS)
+
+def parse_arg(arg, table):
+    """Преобразует аргумент в опцию (None, если не найден)."""
+    return table.get(arg.lower())
 
 def main():
-    shapes = ["круг", "квадрат", "треугольник"]
-    colors = ["синий", "красный", "желтый"]
+    import sys
+    
+    shapes = SHAPE_OPTIONS
+    colors = COLOR_OPTIONS
     
     # Проверка аргументов командной строки
     if len(sys.argv) == 2 and sys.argv[1] in ["-h", "--help", "?"]:
@@ -109,10 +151,10 @@ def main():
     
     if len(sys.argv) == 5:
         # Режим с аргументами: python create_icon.py фон_фигура фон_цвет фигура цвет
-        bg_shape = parse_arg(sys.argv[1], shapes)
-        bg_color = parse_arg(sys.argv[2], colors)
-        fg_shape = parse_arg(sys.argv[3], shapes)
-        fg_color = parse_arg(sys.argv[4], colors)
+        bg_shape = parse_arg(sys.argv[1], SHAPE_LOOKUP)
+        bg_color = parse_arg(sys.argv[2], COLOR_LOOKUP)
+        fg_shape = parse_arg(sys.argv[3], SHAPE_LOOKUP)
+        fg_color = parse_arg(sys.argv[4], COLOR_LOOKUP)
         
         if not all([bg_shape, bg_color, fg_shape, fg_color]):
             print("[!] Неверные аргументы!")
@@ -147,22 +189,15 @@ def main():
     # Рисуем иконки всех размеров
     icons = [draw_icon(s, bg_shape, bg_color, fg_shape, fg_color) for s, _ in sizes]
     
-    # Сохраняем в формате ICO
+    # Сохраняем в формате ICO: каждый размер уже отрисован, повторное
+    # масштабирование в кодировщике PIL не нужно
     try:
-        icons[0].save(
-            "app.ico",
-            format="ICO",
-            sizes=sizes,
-            append_images=icons[1:]
-        )
+        with open("app.ico", "wb") as f:
+            f.write(pack_ico(icons))
         print("\n[OK] Иконка 'app.ico' создана!")
         print(f"     Дизайн: {fg_color} {fg_shape} на {bg_color} {bg_shape}")
-    except Exception as e:
+    except OSError as e:
         print(f"[!] Ошибка при сохранении: {e}")
-        # Альтернативный способ
-        print("Попытка альтернативного метода...")
-        icons[0].save("app.ico", format="ICO")
-        print("[OK] Иконка 'app.ico' создана (только один размер)")
 
 if __name__ == "__main__":
     main()
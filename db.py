@@ -3,9 +3,14 @@
 CRUD-операции для таблиц prompts, models, results, settings.
 """
 
+import atexit
+import hashlib
+import itertools
+import json
+import queue
 import sqlite3
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional
 from contextlib import contextmanager
 
 from models import Prompt, Model, Result, Settings
@@ -14,21 +19,123 @@ from models import Prompt, Model, Result, Settings
 # Путь к файлу базы данных
 DB_PATH = Path(__file__).parent / "chatlist.db"
 
+# Версия схемы БД; увеличивается при изменении init_db()/seed_db()
+SCHEMA_VERSION = 4
+
+# PRAGMA, применяемые к каждому новому подключению
+CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -16384",
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+class ConnectionPool:
+    """Пул долгоживущих подключений к SQLite.
+    
+    Подключения открываются один раз и переиспользуются между вызовами,
+    поэтому кэш страниц SQLite остаётся «горячим», а PRAGMA не
+    выполняются на каждый запрос.
+    """
+    
+    def __init__(self, db_path, max_size: int = 4, uri: bool = False):
+        self.db_path = db_path
+        # db_path - URI вида "file:...?mode=memory" (например, БД в памяти для тестов)
+        self.uri = uri
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=max_size)
+        self._wal_enabled = False
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Открыть новое подключение и применить PRAGMA."""
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=256,
+            uri=self.uri
+        )
+        # Строки как кортежи: датаклассы собираются позиционно
+        conn.row_factory = None
+        # Режим WAL сохраняется в файле БД, достаточно включить его один раз
+        if not self._wal_enabled:
+            conn.execute("PRAGMA journal_mode = WAL")
+            self._wal_enabled = True
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def acquire(self) -> sqlite3.Connection:
+        """Взять подключение из пула (или открыть новое)."""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._connect()
+    
+    def release(self, conn: sqlite3.Connection):
+        """Вернуть подключение в пул."""
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+    
+    def idle_count(self) -> int:
+        """Сколько открытых подключений ждёт в пуле."""
+        return self._pool.qsize()
+    
+    def close_all(self):
+        """Закрыть все подключения пула."""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+
+
+_pool = ConnectionPool(DB_PATH)
+
+
+def optimize():
+    """Обновить статистику планировщика запросов (PRAGMA optimize)."""
+    conn = _pool.acquire()
+    try:
+        conn.execute("PRAGMA optimize")
+    finally:
+        _pool.release(conn)
+
+
+def _optimize_and_close():
+    """Выполнить PRAGMA optimize и закрыть подключения при выходе."""
+    # БД в этом процессе не использовалась - файл не открываем
+    if _pool.idle_count() == 0:
+        return
+    try:
+        optimize()
+    except sqlite3.Error:
+        pass
+    _pool.close_all()
+
+
+atexit.register(_optimize_and_close)
+
 
 @contextmanager
 def get_connection():
-    """Контекстный менеджер для подключения к БД."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
+    """Контекстный менеджер для подключения к БД (одна транзакция)."""
+    conn = _pool.acquire()
+    conn.execute("BEGIN")
     try:
         yield conn
-        conn.commit()
-    except Exception:
-        conn.rollback()
+        conn.execute("COMMIT")
+    except BaseException:
+        # BaseException: в т.ч. GeneratorExit у незавершённых генераторов
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
         raise
     finally:
-        conn.close()
+        _pool.release(conn)
 
 
 def init_db():
@@ -42,10 +149,21 @@ def init_db():
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 text TEXT NOT NULL,
                 author TEXT DEFAULT 'user',
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                text_hash TEXT
             )
         """)
         
+        # Хэш текста для поиска сохранённых ответов (БД прежних версий)
+        cursor.execute("PRAGMA table_info(prompts)")
+        if "text_hash" not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE prompts ADD COLUMN text_hash TEXT")
+        cursor.execute("SELECT id, text FROM prompts WHERE text_hash IS NULL")
+        cursor.executemany(
+            "UPDATE prompts SET text_hash = ? WHERE id = ?",
+            [(prompt_hash(text), prompt_id) for prompt_id, text in cursor.fetchall()]
+        )
+        
         # Таблица моделей
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS models (
@@ -80,11 +198,52 @@ def init_db():
         """)
         
         # Создание индексов
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_prompts_text ON prompts(text)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_prompts_created ON prompts(created_at)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_models_active ON models(is_active)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_results_prompt ON results(prompt_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_results_selected ON results(is_selected)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_prompts_text_hash ON prompts(text_hash)")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_results_prompt_created ON results(prompt_id, created_at)"
+        )
+        
+        # Неиспользуемые индексы прежних версий: флаги 0/1 (низкая селективность),
+        # prompt_id (покрыт составным индексом), text (поиск идёт через FTS5)
+        for index_name in (
+            "idx_results_selected",
+            "idx_models_active",
+            "idx_results_prompt",
+            "idx_prompts_text",
+        ):
+            cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
+        
+        # Полнотекстовый индекс промптов (триграммы - поиск по подстроке)
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts USING fts5(
+                text,
+                content='prompts',
+                content_rowid='id',
+                tokenize='trigram'
+            )
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS prompts_fts_insert AFTER INSERT ON prompts BEGIN
+                INSERT INTO prompts_fts (rowid, text) VALUES (new.id, new.text);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS prompts_fts_delete AFTER DELETE ON prompts BEGIN
+                INSERT INTO prompts_fts (prompts_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS prompts_fts_update AFTER UPDATE OF text ON prompts BEGIN
+                INSERT INTO prompts_fts (prompts_fts, rowid, text) VALUES ('delete', old.id, old.text);
+                INSERT INTO prompts_fts (rowid, text) VALUES (new.id, new.text);
+            END
+        """)
+        # Переиндексация уже существующих промптов
+        cursor.execute("INSERT INTO prompts_fts (prompts_fts) VALUES ('rebuild')")
+        
+        # Первичный сбор статистики для планировщика по всем таблицам
+        cursor.execute("PRAGMA optimize(0x10002)")
 
 
 def seed_db():
@@ -118,11 +277,10 @@ def seed_db():
         ]
         
         # Добавляем только те модели, которых ещё нет
-        for name, api_url, api_id in all_models:
-            cursor.execute(
-                "INSERT OR IGNORE INTO models (name, api_url, api_id) VALUES (?, ?, ?)",
-                (name, api_url, api_id)
-            )
+        cursor.executemany(
+            "INSERT OR IGNORE INTO models (name, api_url, api_id) VALUES (?, ?, ?)",
+            all_models
+        )
         
         # Добавляем настройки по умолчанию
         default_settings = [
@@ -130,45 +288,133 @@ def seed_db():
             ("default_author", "user"),
             ("request_timeout", "30"),
         ]
-        for key, value in default_settings:
-            cursor.execute(
-                "INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)",
-                (key, value)
-            )
+        cursor.executemany(
+            "INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)",
+            default_settings
+        )
+    
+    _invalidate_settings_cache()
+    _invalidate_models_cache()
 
 
 # =====================
 # CRUD для Prompts
 # =====================
 
+def prompt_hash(text: str) -> str:
+    """Хэш текста промпта без учёта различий в пробелах и переводах строк."""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+_SQL_INSERT_PROMPT = "INSERT INTO prompts (text, author, text_hash) VALUES (?, ?, ?) RETURNING id"
+_PROMPT_COLUMNS = "id, text, author, created_at"
+_SQL_GET_PROMPT = f"SELECT {_PROMPT_COLUMNS} FROM prompts WHERE id = ?"
+_SQL_DELETE_PROMPT = "DELETE FROM prompts WHERE id = ?"
+
+
+# Триграммный индекс не находит запросы короче 3 символов
+FTS_MIN_QUERY_LENGTH = 3
+
+_SEARCH_CONDITIONS = {
+    None: None,
+    "fts": "id IN (SELECT rowid FROM prompts_fts WHERE prompts_fts MATCH ?)",
+    "like": "text LIKE ?",
+}
+
+
+# Строка для списка истории: "[дд.мм] " + первые PREVIEW_LENGTH символов
+# в одну строку; считается в SQLite, чтобы не передавать полный текст
+PREVIEW_LENGTH = 50
+_PROMPT_PREVIEW_COLUMNS = f"""id,
+    coalesce('[' || strftime('%d.%m', created_at) || '] ', '')
+    || replace(substr(text, 1, {PREVIEW_LENGTH}), char(10), ' ')
+    || CASE WHEN length(text) > {PREVIEW_LENGTH} THEN '...' ELSE '' END"""
+
+
+def _build_prompts_query(columns: str, search: Optional[str], date_from: bool, date_to: bool) -> str:
+    """Собрать SQL выборки промптов под заданный набор фильтров."""
+    conditions = []
+    if search:
+        conditions.append(_SEARCH_CONDITIONS[search])
+    if date_from:
+        conditions.append("date(created_at) >= ?")
+    if date_to:
+        conditions.append("date(created_at) <= ?")
+    where_clause = " AND ".join(conditions) if conditions else "1=1"
+    return (
+        f"SELECT {columns} FROM prompts "
+        f"WHERE {where_clause} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?"
+    )
+
+
+# Все варианты запроса заранее: одинаковые строки попадают в кэш
+# подготовленных выражений sqlite3
+_SQL_ALL_PROMPTS = {
+    flags: _build_prompts_query(_PROMPT_COLUMNS, *flags)
+    for flags in itertools.product(_SEARCH_CONDITIONS, (False, True), (False, True))
+}
+_SQL_PROMPT_PREVIEWS = {
+    flags: _build_prompts_query(_PROMPT_PREVIEW_COLUMNS, *flags)
+    for flags in itertools.product(_SEARCH_CONDITIONS, (False, True), (False, True))
+}
+
+
+def _prompts_query_args(search: str, date_from: str, date_to: str, limit: int, offset: int) -> tuple:
+    """Ключ варианта запроса и параметры для выборки промптов с фильтрами."""
+    params = []
+    search_mode = None
+    
+    if len(search) >= FTS_MIN_QUERY_LENGTH:
+        # Запрос целиком как фраза FTS5 (кавычки экранируются удвоением)
+        search_mode = "fts"
+        params.append('"' + search.replace('"', '""') + '"')
+    elif search:
+        search_mode = "like"
+        params.append(f"%{search}%")
+    
+    if date_from:
+        params.append(date_from)
+    
+    if date_to:
+        params.append(date_to)
+    
+    params.append(limit)
+    params.append(offset)
+    
+    return (search_mode, bool(date_from), bool(date_to)), params
+
+
 def create_prompt(prompt: Prompt) -> int:
     """Создать новый промпт. Возвращает ID."""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO prompts (text, author) VALUES (?, ?)",
-            (prompt.text, prompt.author)
-        )
-        return cursor.lastrowid
+        cursor.execute(_SQL_INSERT_PROMPT, (prompt.text, prompt.author, prompt_hash(prompt.text)))
+        return cursor.fetchone()[0]
+
+
+def create_prompts_bulk(prompts: List[Prompt]) -> List[int]:
+    """Создать несколько промптов в одной транзакции. Возвращает их ID."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        prompt_ids = []
+        for prompt in prompts:
+            cursor.execute(_SQL_INSERT_PROMPT, (prompt.text, prompt.author, prompt_hash(prompt.text)))
+            prompt_ids.append(cursor.fetchone()[0])
+        return prompt_ids
 
 
 def get_prompt(prompt_id: int) -> Optional[Prompt]:
     """Получить промпт по ID."""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM prompts WHERE id = ?", (prompt_id,))
+        cursor.execute(_SQL_GET_PROMPT, (prompt_id,))
         row = cursor.fetchone()
-        if row:
-            return Prompt(
-                id=row["id"],
-                text=row["text"],
-                author=row["author"],
-                created_at=row["created_at"]
-            )
-        return None
+        return Prompt(*row) if row else None
 
 
-def get_all_prompts(search: str = "", date_from: str = "", date_to: str = "", limit: int = 100) -> List[Prompt]:
+def get_all_prompts(
+    search: str = "", date_from: str = "", date_to: str = "", limit: int = 100, offset: int = 0
+) -> List[Prompt]:
     """Получить список промптов с возможностью поиска по тексту и дате.
     
     Args:
@@ -176,49 +422,31 @@ def get_all_prompts(search: str = "", date_from: str = "", date_to: str = "", li
         date_from: Начальная дата в формате YYYY-MM-DD
         date_to: Конечная дата в формате YYYY-MM-DD
         limit: Максимальное количество результатов
+        offset: Сколько первых (самых новых) промптов пропустить
     """
+    key, params = _prompts_query_args(search, date_from, date_to, limit, offset)
     with get_connection() as conn:
         cursor = conn.cursor()
-        
-        conditions = []
-        params = []
-        
-        if search:
-            conditions.append("text LIKE ?")
-            params.append(f"%{search}%")
-        
-        if date_from:
-            conditions.append("date(created_at) >= ?")
-            params.append(date_from)
-        
-        if date_to:
-            conditions.append("date(created_at) <= ?")
-            params.append(date_to)
-        
-        where_clause = " AND ".join(conditions) if conditions else "1=1"
-        params.append(limit)
-        
-        cursor.execute(
-            f"SELECT * FROM prompts WHERE {where_clause} ORDER BY created_at DESC LIMIT ?",
-            params
-        )
-        
-        return [
-            Prompt(
-                id=row["id"],
-                text=row["text"],
-                author=row["author"],
-                created_at=row["created_at"]
-            )
-            for row in cursor.fetchall()
-        ]
+        cursor.execute(_SQL_ALL_PROMPTS[key], params)
+        return [Prompt(*row) for row in cursor]
+
+
+def get_prompt_previews(
+    search: str = "", date_from: str = "", date_to: str = "", limit: int = 100, offset: int = 0
+) -> List[tuple]:
+    """Получить (id, строка для списка) промптов; фильтры и страницы как у get_all_prompts."""
+    key, params = _prompts_query_args(search, date_from, date_to, limit, offset)
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_SQL_PROMPT_PREVIEWS[key], params)
+        return cursor.fetchall()
 
 
 def delete_prompt(prompt_id: int) -> bool:
     """Удалить промпт по ID."""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM prompts WHERE id = ?", (prompt_id,))
+        cursor.execute(_SQL_DELETE_PROMPT, (prompt_id,))
         return cursor.rowcount > 0
 
 
@@ -226,52 +454,62 @@ def delete_prompt(prompt_id: int) -> bool:
 # CRUD для Models
 # =====================
 
+_SQL_INSERT_MODEL = (
+    "INSERT INTO models (name, api_url, api_id, is_active) VALUES (?, ?, ?, ?) RETURNING id"
+)
+# executemany не поддерживает RETURNING
+_SQL_INSERT_MODEL_NO_RETURN = "INSERT INTO models (name, api_url, api_id, is_active) VALUES (?, ?, ?, ?)"
+_MODEL_COLUMNS = "id, name, api_url, api_id, is_active"
+_SQL_GET_MODEL = f"SELECT {_MODEL_COLUMNS} FROM models WHERE id = ?"
+_SQL_ALL_MODELS = f"SELECT {_MODEL_COLUMNS} FROM models ORDER BY name"
+_SQL_UPDATE_MODEL = """UPDATE models 
+               SET name = ?, api_url = ?, api_id = ?, is_active = ? 
+               WHERE id = ?"""
+_SQL_DELETE_MODEL = "DELETE FROM models WHERE id = ?"
+
+
+# Кэш строк таблицы models (None - не загружен); Model создаются
+# заново при каждом чтении, поэтому их можно менять без вреда для кэша
+_models_cache: Optional[List[tuple]] = None
+
+
+def _invalidate_models_cache():
+    """Сбросить кэш моделей после записи в таблицу models."""
+    global _models_cache
+    _models_cache = None
+
+
 def create_model(model: Model) -> int:
     """Создать новую модель. Возвращает ID."""
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
-            "INSERT INTO models (name, api_url, api_id, is_active) VALUES (?, ?, ?, ?)",
-            (model.name, model.api_url, model.api_id, int(model.is_active))
+            _SQL_INSERT_MODEL,
+            (model.name, model.api_url, model.api_id, model.is_active)
         )
-        return cursor.lastrowid
+        model_id = cursor.fetchone()[0]
+    _invalidate_models_cache()
+    return model_id
 
 
 def get_model(model_id: int) -> Optional[Model]:
     """Получить модель по ID."""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM models WHERE id = ?", (model_id,))
+        cursor.execute(_SQL_GET_MODEL, (model_id,))
         row = cursor.fetchone()
-        if row:
-            return Model(
-                id=row["id"],
-                name=row["name"],
-                api_url=row["api_url"],
-                api_id=row["api_id"],
-                is_active=bool(row["is_active"])
-            )
-        return None
+        return Model(*row) if row else None
 
 
 def get_all_models(active_only: bool = False) -> List[Model]:
     """Получить список моделей."""
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        if active_only:
-            cursor.execute("SELECT * FROM models WHERE is_active = 1 ORDER BY name")
-        else:
-            cursor.execute("SELECT * FROM models ORDER BY name")
-        return [
-            Model(
-                id=row["id"],
-                name=row["name"],
-                api_url=row["api_url"],
-                api_id=row["api_id"],
-                is_active=bool(row["is_active"])
-            )
-            for row in cursor.fetchall()
-        ]
+    global _models_cache
+    if _models_cache is None:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SQL_ALL_MODELS)
+            _models_cache = cursor.fetchall()
+    return [Model(*row) for row in _models_cache if row[4] or not active_only]
 
 
 def update_model(model: Model) -> bool:
@@ -279,99 +517,130 @@ def update_model(model: Model) -> bool:
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
-            """UPDATE models 
-               SET name = ?, api_url = ?, api_id = ?, is_active = ? 
-               WHERE id = ?""",
-            (model.name, model.api_url, model.api_id, int(model.is_active), model.id)
+            _SQL_UPDATE_MODEL,
+            (model.name, model.api_url, model.api_id, model.is_active, model.id)
         )
-        return cursor.rowcount > 0
+        updated = cursor.rowcount > 0
+    _invalidate_models_cache()
+    return updated
+
+
+def save_models_bulk(to_update: List[Model], to_insert: List[Model]):
+    """Обновить и добавить модели в одной транзакции."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany(
+            _SQL_UPDATE_MODEL,
+            [(m.name, m.api_url, m.api_id, m.is_active, m.id) for m in to_update]
+        )
+        cursor.executemany(
+            _SQL_INSERT_MODEL_NO_RETURN,
+            [(m.name, m.api_url, m.api_id, m.is_active) for m in to_insert]
+        )
+    _invalidate_models_cache()
 
 
 def delete_model(model_id: int) -> bool:
     """Удалить модель по ID."""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM models WHERE id = ?", (model_id,))
-        return cursor.rowcount > 0
+        cursor.execute(_SQL_DELETE_MODEL, (model_id,))
+        deleted = cursor.rowcount > 0
+    _invalidate_models_cache()
+    return deleted
 
 
 # =====================
 # CRUD для Results
 # =====================
 
+_SQL_INSERT_RESULT = """INSERT INTO results (prompt_id, model_id, response_text, is_selected) 
+               VALUES (?, ?, ?, ?)
+               RETURNING id"""
+_SQL_RESULTS_FOR_PROMPT = """SELECT r.id, r.prompt_id, r.model_id, r.response_text,
+                      r.is_selected, r.created_at, m.name as model_name
+               FROM results r
+               JOIN models m ON r.model_id = m.id
+               WHERE r.prompt_id = ?
+               ORDER BY r.created_at"""
+_SQL_SELECTED_RESULTS = """SELECT r.id, r.prompt_id, r.model_id, r.response_text,
+                      r.is_selected, r.created_at, m.name as model_name,
+                      p.text as prompt_text
+               FROM results r
+               JOIN prompts p ON r.prompt_id = p.id
+               JOIN models m ON r.model_id = m.id
+               WHERE r.is_selected = 1
+               ORDER BY r.created_at DESC"""
+_SQL_UPDATE_RESULT_SELECTION = "UPDATE results SET is_selected = ? WHERE id = ?"
+# Список ID передаётся одним JSON-параметром: один подготовленный запрос на любое N
+_SQL_UPDATE_RESULTS_SELECTION = (
+    "UPDATE results SET is_selected = ? WHERE id IN (SELECT value FROM json_each(?))"
+)
+_SQL_DELETE_RESULT = "DELETE FROM results WHERE id = ?"
+# Последний ответ каждой модели на промпт с тем же текстом; при max()
+# SQLite берёт остальные столбцы из той же строки
+_SQL_CACHED_RESPONSES = """SELECT r.model_id, r.response_text, max(r.id)
+               FROM results r
+               JOIN prompts p ON r.prompt_id = p.id
+               WHERE p.text_hash = ? AND r.model_id IN (SELECT value FROM json_each(?))
+               GROUP BY r.model_id"""
+
+
 def create_result(result: Result) -> int:
     """Создать новый результат. Возвращает ID."""
     with get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
-            """INSERT INTO results (prompt_id, model_id, response_text, is_selected) 
-               VALUES (?, ?, ?, ?)""",
-            (result.prompt_id, result.model_id, result.response_text, int(result.is_selected))
+            _SQL_INSERT_RESULT,
+            (result.prompt_id, result.model_id, result.response_text, result.is_selected)
         )
-        return cursor.lastrowid
+        return cursor.fetchone()[0]
+
+
+def create_results_bulk(results: List[Result]) -> List[int]:
+    """Создать несколько результатов в одной транзакции. Возвращает их ID."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        result_ids = []
+        for result in results:
+            cursor.execute(
+                _SQL_INSERT_RESULT,
+                (result.prompt_id, result.model_id, result.response_text, result.is_selected)
+            )
+            result_ids.append(cursor.fetchone()[0])
+        return result_ids
 
 
 def get_results_for_prompt(prompt_id: int) -> List[Result]:
     """Получить все результаты для промпта."""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            """SELECT r.*, m.name as model_name 
-               FROM results r
-               JOIN models m ON r.model_id = m.id
-               WHERE r.prompt_id = ?
-               ORDER BY r.created_at""",
-            (prompt_id,)
-        )
-        return [
-            Result(
-                id=row["id"],
-                prompt_id=row["prompt_id"],
-                model_id=row["model_id"],
-                response_text=row["response_text"],
-                is_selected=bool(row["is_selected"]),
-                created_at=row["created_at"],
-                model_name=row["model_name"]
-            )
-            for row in cursor.fetchall()
-        ]
+        cursor.execute(_SQL_RESULTS_FOR_PROMPT, (prompt_id,))
+        return [Result(*row) for row in cursor]
+
 
+# Размер пачки строк при потоковом чтении результатов
+FETCH_BATCH_SIZE = 64
 
-def get_selected_results() -> List[Result]:
-    """Получить все избранные результаты."""
+
+def get_selected_results() -> Iterator[Result]:
+    """Получить все избранные результаты (потоково, пачками по FETCH_BATCH_SIZE)."""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            """SELECT r.*, p.text as prompt_text, m.name as model_name
-               FROM results r
-               JOIN prompts p ON r.prompt_id = p.id
-               JOIN models m ON r.model_id = m.id
-               WHERE r.is_selected = 1
-               ORDER BY r.created_at DESC"""
-        )
-        return [
-            Result(
-                id=row["id"],
-                prompt_id=row["prompt_id"],
-                model_id=row["model_id"],
-                response_text=row["response_text"],
-                is_selected=True,
-                created_at=row["created_at"],
-                model_name=row["model_name"],
-                prompt_text=row["prompt_text"]
-            )
-            for row in cursor.fetchall()
-        ]
+        cursor.execute(_SQL_SELECTED_RESULTS)
+        while True:
+            rows = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                yield Result(*row)
 
 
 def update_result_selection(result_id: int, is_selected: bool) -> bool:
     """Обновить статус избранного для результата."""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE results SET is_selected = ? WHERE id = ?",
-            (int(is_selected), result_id)
-        )
+        cursor.execute(_SQL_UPDATE_RESULT_SELECTION, (is_selected, result_id))
         return cursor.rowcount > 0
 
 
@@ -379,10 +648,9 @@ def update_results_selection(result_ids: List[int], is_selected: bool) -> int:
     """Обновить статус избранного для нескольких результатов."""
     with get_connection() as conn:
         cursor = conn.cursor()
-        placeholders = ",".join("?" * len(result_ids))
         cursor.execute(
-            f"UPDATE results SET is_selected = ? WHERE id IN ({placeholders})",
-            [int(is_selected)] + result_ids
+            _SQL_UPDATE_RESULTS_SELECTION,
+            (is_selected, json.dumps(result_ids))
         )
         return cursor.rowcount
 
@@ -391,31 +659,58 @@ def delete_result(result_id: int) -> bool:
     """Удалить результат по ID."""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM results WHERE id = ?", (result_id,))
+        cursor.execute(_SQL_DELETE_RESULT, (result_id,))
         return cursor.rowcount > 0
 
 
+def get_cached_responses(prompt_text: str, model_ids: List[int]) -> Dict[int, str]:
+    """Сохранённые ответы моделей на такой же промпт: {model_id: response_text}."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_SQL_CACHED_RESPONSES, (prompt_hash(prompt_text), json.dumps(model_ids)))
+        return {model_id: response_text for model_id, response_text, _ in cursor}
+
+
 # =====================
 # Функции для Settings
 # =====================
 
+_SQL_SET_SETTING = "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)"
+
+# Кэш таблицы settings в памяти процесса (None - ещё не загружен)
+_settings_cache: Optional[dict] = None
+
+
+def _load_settings() -> dict:
+    """Загрузить все настройки одним запросом и закэшировать их."""
+    global _settings_cache
+    if _settings_cache is None:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT key, value FROM settings")
+            _settings_cache = dict(cursor.fetchall())
+    return _settings_cache
+
+
+def _invalidate_settings_cache():
+    """Сбросить кэш настроек (после записи в обход set_setting)."""
+    global _settings_cache
+    _settings_cache = None
+
+
 def get_setting(key: str, default: str = "") -> str:
     """Получить значение настройки."""
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
-        row = cursor.fetchone()
-        return row["value"] if row else default
+    return _load_settings().get(key, default)
 
 
 def set_setting(key: str, value: str):
     """Установить значение настройки."""
     with get_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(
-            "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
-            (key, value)
-        )
+        cursor.execute(_SQL_SET_SETTING, (key, value))
+    # Запись в кэш только после успешного коммита
+    if _settings_cache is not None:
+        _settings_cache[key] = value
 
 
 def get_all_settings() -> Settings:
@@ -423,7 +718,9 @@ def get_all_settings() -> Settings:
     return Settings(
         theme=get_setting("theme", "dark"),
         default_author=get_setting("default_author", "user"),
-        request_timeout=int(get_setting("request_timeout", "30"))
+        request_timeout=int(get_setting("request_timeout", "30")),
+        max_concurrent_requests=int(get_setting("max_concurrent_requests", "16")),
+        use_response_cache=int(get_setting("use_response_cache", "1"))
     )
 
 
@@ -432,9 +729,29 @@ def save_settings(settings: Settings):
     set_setting("theme", settings.theme)
     set_setting("default_author", settings.default_author)
     set_setting("request_timeout", str(settings.request_timeout))
+    set_setting("max_concurrent_requests", str(settings.max_concurrent_requests))
+    set_setting("use_response_cache", str(settings.use_response_cache))
+
+
+def _get_schema_version() -> Optional[str]:
+    """Получить версию схемы, записанную в БД (None, если БД не создана)."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'settings' LIMIT 1"
+        )
+        if cursor.fetchone() is None:
+            return None
+        cursor.execute("SELECT value FROM settings WHERE key = 'schema_version'")
+        row = cursor.fetchone()
+        return row[0] if row else None
 
 
-# Инициализация БД при импорте модуля
-init_db()
-seed_db()
+def ensure_initialized():
+    """Создать схему и тестовые данные, только если версия схемы устарела."""
+    if _get_schema_version() == str(SCHEMA_VERSION):
+        return
+    init_db()
+    seed_db()
+    set_setting("schema_version", str(SCHEMA_VERSION))
 
@@ -4,12 +4,11 @@ ChatList - приложение для сравнения ответов раз
 """
 
 import sys
-import asyncio
 import json
-from datetime import datetime, date
-from typing import List, Optional
-
-import markdown
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
 
 from PyQt6.QtWidgets import (
     QApplication,
@@ -20,6 +19,7 @@ from PyQt6.QtWidgets import (
     QLabel,
     QPushButton,
     QTextEdit,
+    QPlainTextEdit,
     QTextBrowser,
     QComboBox,
     QCheckBox,
@@ -33,20 +33,67 @@ from PyQt6.QtWidgets import (
     QDialog,
     QDateEdit,
     QSpinBox,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QHeaderView,
+    QStyledItemDelegate,
+    QStyleOptionButton,
+    QStyle,
     QFileDialog,
     QTabWidget,
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QDate
-from PyQt6.QtGui import QFont, QIcon
+from PyQt6.QtCore import (
+    Qt,
+    QObject,
+    QThread,
+    QTimer,
+    QSignalBlocker,
+    QEvent,
+    pyqtSignal,
+    QDate,
+    QAbstractTableModel,
+    QAbstractListModel,
+    QModelIndex,
+    QSize,
+)
+from PyQt6.QtGui import QIcon
 
 import db
 from models import Prompt, Model, Result, Settings
-from network import LLMClient, send_to_multiple_models, APIResponse, improve_prompt, ImprovedPrompt
 from version import __version__
 
+# markdown, asyncio и сетевой модуль (httpx) импортируются при первом
+# использовании: окно показывается, не дожидаясь их загрузки
+if TYPE_CHECKING:
+    from network import APIResponse, ImprovedPrompt
+
+
+# Интервал периодического PRAGMA optimize (мс)
+DB_OPTIMIZE_INTERVAL_MS = 3 * 60 * 60 * 1000
+
+# Задержка перед записью изменений «Избранного» в БД (мс)
+SELECTION_FLUSH_DELAY_MS = 300
+
+# Пауза в наборе текста, после которой выполняется поиск по истории (мс)
+SEARCH_DEBOUNCE_MS = 250
+
+# Сколько диалогов просмотра ответов держать готовыми для повторного открытия
+VIEWER_CACHE_SIZE = 16
+
+# Сколько символов ответа показывает карточка до первой отрисовки
+RESULT_PREVIEW_CHARS = 200
+
+# Предел строк в поле ответа карточки; полный текст - в окне просмотра
+RESULT_MAX_BLOCKS = 5000
+
+# Сколько промптов истории загружается за раз (следующие - при прокрутке списка)
+HISTORY_PAGE_SIZE = 100
+
+# С какого числа ответов JSON-экспорт пишется без отступов
+JSON_COMPACT_THRESHOLD = 50
+
+# Через сколько после запуска заранее соединиться с API моделей (мс)
+NETWORK_WARMUP_DELAY_MS = 1000
+
 
 # =====================
 # Стили приложения
@@ -73,7 +120,7 @@ QGroupBox::title {
     color: #89b4fa;
 }
 
-QTextEdit, QLineEdit, QComboBox, QDateEdit, QSpinBox {
+QTextEdit, QPlainTextEdit, QLineEdit, QComboBox, QDateEdit, QSpinBox {
     background-color: #313244;
     border: 1px solid #45475a;
     border-radius: 6px;
@@ -82,7 +129,7 @@ QTextEdit, QLineEdit, QComboBox, QDateEdit, QSpinBox {
     selection-background-color: #89b4fa;
 }
 
-QTextEdit:focus, QLineEdit:focus {
+QTextEdit:focus, QPlainTextEdit:focus, QLineEdit:focus {
     border: 1px solid #89b4fa;
 }
 
@@ -198,18 +245,22 @@ QFrame#resultCard[selected="true"] {
     border: 2px solid #a6e3a1;
 }
 
-QTableWidget {
+QFrame#resultCard [error="true"] {
+    color: #f38ba8;
+}
+
+QTableView {
     background-color: #313244;
     border: 1px solid #45475a;
     border-radius: 6px;
     gridline-color: #45475a;
 }
 
-QTableWidget::item {
+QTableView::item {
     padding: 8px;
 }
 
-QTableWidget::item:selected {
+QTableView::item:selected {
     background-color: #89b4fa;
     color: #1e1e2e;
 }
@@ -262,7 +313,7 @@ QGroupBox::title {
     color: #1e66f5;
 }
 
-QTextEdit, QLineEdit, QComboBox, QDateEdit, QSpinBox {
+QTextEdit, QPlainTextEdit, QLineEdit, QComboBox, QDateEdit, QSpinBox {
     background-color: #ffffff;
     border: 1px solid #ccd0da;
     border-radius: 6px;
@@ -271,7 +322,7 @@ QTextEdit, QLineEdit, QComboBox, QDateEdit, QSpinBox {
     selection-background-color: #1e66f5;
 }
 
-QTextEdit:focus, QLineEdit:focus {
+QTextEdit:focus, QPlainTextEdit:focus, QLineEdit:focus {
     border: 1px solid #1e66f5;
 }
 
@@ -387,18 +438,22 @@ QFrame#resultCard[selected="true"] {
     border: 2px solid #40a02b;
 }
 
-QTableWidget {
+QFrame#resultCard [error="true"] {
+    color: #d20f39;
+}
+
+QTableView {
     background-color: #ffffff;
     border: 1px solid #ccd0da;
     border-radius: 6px;
     gridline-color: #ccd0da;
 }
 
-QTableWidget::item {
+QTableView::item {
     padding: 8px;
 }
 
-QTableWidget::item:selected {
+QTableView::item:selected {
     background-color: #1e66f5;
     color: #ffffff;
 }
@@ -432,71 +487,146 @@ QTabBar::tab:selected {
 
 
 # =====================
-# Рабочий поток для API запросов
+# Фоновые задачи для API запросов
 # =====================
 
-class APIWorker(QThread):
-    """Фоновый поток для выполнения API запросов."""
+class NetworkTask(QObject):
+    """Задача на общем сетевом цикле событий (без отдельного потока Qt).
+    
+    Корутина, созданная фабрикой run, выполняется в цикле из
+    network.get_event_loop(); сигналы, испускаемые из него, доставляются
+    в поток GUI очередью Qt.
+    """
     
-    finished = pyqtSignal(dict)  # {model_id: APIResponse}
     error = pyqtSignal(str)
-    progress = pyqtSignal(str)  # Сообщение о прогрессе
     
-    def __init__(self, models: List[Model], prompt: str, timeout: int = 30):
+    def __init__(self, run: Callable[[], Awaitable[None]]):
         super().__init__()
+        self._run_task = run
+    
+    def start(self):
+        """Запланировать выполнение задачи."""
+        from network import run_coroutine
+        
+        future = run_coroutine(self._run_task())
+        future.add_done_callback(self._on_done)
+    
+    def _on_done(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            self.error.emit(str(future.exception()))
+
+
+class APIWorker(NetworkTask):
+    """Отправка промпта в несколько моделей с сохранением ответов в БД."""
+    
+    result_ready = pyqtSignal(int, object)  # model_id, APIResponse - по мере готовности
+    finished = pyqtSignal(dict, dict)  # {model_id: APIResponse}, {model_id: result_id}
+    progress = pyqtSignal(str)  # Сообщение о прогрессе
+    
+    def __init__(
+        self,
+        models: List[Model],
+        prompt: str,
+        prompt_id: int,
+        timeout: int = 30,
+        max_concurrent: int = 16,
+        cache_enabled: bool = True
+    ):
+        super().__init__(self._run)
         self.models = models
         self.prompt = prompt
+        self.prompt_id = prompt_id
         self.timeout = timeout
-    
-    def run(self):
-        try:
-            self.progress.emit("Отправка запросов...")
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            results = loop.run_until_complete(
-                send_to_multiple_models(self.models, self.prompt, self.timeout)
+        self.max_concurrent = max_concurrent
+        self.cache_enabled = cache_enabled
+    
+    async def _run(self):
+        import asyncio
+        from network import send_to_models_as_completed
+        
+        self.progress.emit("Отправка запросов...")
+        results = {}
+        stream = send_to_models_as_completed(
+            self.models, self.prompt, self.timeout, self.max_concurrent,
+            self.cache_enabled
+        )
+        async for model_id, response in stream:
+            results[model_id] = response
+            self.result_ready.emit(model_id, response)
+            self.progress.emit(f"Получено {len(results)} из {len(self.models)}")
+        # Запись в SQLite блокирующая - выполняем её вне цикла событий
+        result_ids = await asyncio.to_thread(self._save_results, results)
+        self.finished.emit(results, result_ids)
+    
+    def _save_results(self, results: dict) -> dict:
+        """Сохранить успешные ответы в БД одной транзакцией."""
+        model_ids = [model_id for model_id, response in results.items() if response.success]
+        saved_ids = db.create_results_bulk([
+            Result(
+                prompt_id=self.prompt_id,
+                model_id=model_id,
+                response_text=results[model_id].content
             )
-            loop.close()
-            self.finished.emit(results)
-        except Exception as e:
-            self.error.emit(str(e))
+            for model_id in model_ids
+        ])
+        return dict(zip(model_ids, saved_ids))
 
 
-class ImproveWorker(QThread):
-    """Фоновый поток для улучшения промта."""
+class ImproveWorker(NetworkTask):
+    """Улучшение промта выбранной моделью."""
     
     finished = pyqtSignal(object)  # ImprovedPrompt
-    error = pyqtSignal(str)
     
     def __init__(self, model: Model, prompt: str, timeout: int = 60):
-        super().__init__()
+        super().__init__(self._run)
         self.model = model
         self.prompt = prompt
         self.timeout = timeout
     
+    async def _run(self):
+        from network import improve_prompt
+        
+        result = await improve_prompt(self.model, self.prompt, self.timeout)
+        self.finished.emit(result)
+
+
+class ExportWorker(QThread):
+    """Запись экспорта в файл в отдельном потоке.
+    
+    Части файла готовит итератор (генератор Markdown или iterencode JSON),
+    поэтому и формирование текста, и запись на диск идут вне потока GUI.
+    """
+    
+    saved = pyqtSignal(str)  # Путь к файлу
+    failed = pyqtSignal(str)  # Текст ошибки
+    
+    def __init__(self, file_path: str, chunks: Iterable[str], parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.chunks = chunks
+    
     def run(self):
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(
-                improve_prompt(self.model, self.prompt, self.timeout)
-            )
-            loop.close()
-            self.finished.emit(result)
-        except Exception as e:
-            self.error.emit(str(e))
+            with open(self.file_path, 'w', encoding='utf-8') as f:
+                for chunk in self.chunks:
+                    f.write(chunk)
+        except OSError as e:
+            self.failed.emit(str(e))
+        else:
+            self.saved.emit(self.file_path)
 
 
 # =====================
 # Диалог просмотра Markdown
 # =====================
 
+# Правила только для диалога просмотра; входят в общий стиль приложения
 MARKDOWN_VIEWER_STYLE = """
-QDialog {
+QDialog#markdownViewer {
     background-color: #1e1e2e;
 }
 
-QTextBrowser {
+QDialog#markdownViewer QTextBrowser {
     background-color: #313244;
     color: #cdd6f4;
     border: 1px solid #45475a;
@@ -506,7 +636,7 @@ QTextBrowser {
     line-height: 1.6;
 }
 
-QPushButton {
+QDialog#markdownViewer QPushButton {
     background-color: #89b4fa;
     color: #1e1e2e;
     border: none;
@@ -516,17 +646,24 @@ QPushButton {
     font-size: 14px;
 }
 
-QPushButton:hover {
+QDialog#markdownViewer QPushButton:hover {
     background-color: #b4befe;
 }
 
-QLabel#dialogTitle {
+QDialog#markdownViewer QLabel#dialogTitle {
     font-size: 20px;
     font-weight: bold;
     color: #89b4fa;
 }
 """
 
+# Таблица стилей приложения для каждой темы: задаётся один раз на
+# QApplication, а не отдельно окну и каждому диалогу
+APP_STYLES = {
+    "dark": DARK_STYLE + MARKDOWN_VIEWER_STYLE,
+    "light": LIGHT_STYLE + MARKDOWN_VIEWER_STYLE,
+}
+
 MARKDOWN_HTML_STYLE = """
 <style>
     body {
@@ -604,6 +741,22 @@ MARKDOWN_HTML_STYLE = """
 </style>
 """
 
+# Один конвертер на всё приложение: создание Markdown с расширениями
+# дороже самой конвертации коротких ответов
+_markdown = None
+
+
+@lru_cache(maxsize=256)
+def render_markdown(markdown_text: str) -> str:
+    """Markdown -> готовый HTML для просмотра; повторные открытия берутся из кэша."""
+    global _markdown
+    if _markdown is None:
+        import markdown
+        _markdown = markdown.Markdown(extensions=['fenced_code', 'tables', 'nl2br'])
+    _markdown.reset()
+    html_content = _markdown.convert(markdown_text)
+    return f"{MARKDOWN_HTML_STYLE}<body>{html_content}</body>"
+
 
 class MarkdownViewerDialog(QDialog):
     """Диалог для просмотра форматированного Markdown."""
@@ -611,9 +764,9 @@ class MarkdownViewerDialog(QDialog):
     def __init__(self, title: str, markdown_text: str, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Просмотр ответа")
+        self.setObjectName("markdownViewer")
         self.setMinimumSize(800, 600)
         self.resize(900, 700)
-        self.setStyleSheet(MARKDOWN_VIEWER_STYLE)
         
         self._setup_ui(title, markdown_text)
     
@@ -627,15 +780,10 @@ class MarkdownViewerDialog(QDialog):
         title_label.setObjectName("dialogTitle")
         layout.addWidget(title_label)
         
-        # Конвертируем markdown в HTML
-        md = markdown.Markdown(extensions=['fenced_code', 'tables', 'nl2br'])
-        html_content = md.convert(markdown_text)
-        full_html = f"{MARKDOWN_HTML_STYLE}<body>{html_content}</body>"
-        
         # Браузер для отображения HTML
         self.text_browser = QTextBrowser()
         self.text_browser.setOpenExternalLinks(True)
-        self.text_browser.setHtml(full_html)
+        self.text_browser.setHtml(render_markdown(markdown_text))
         layout.addWidget(self.text_browser, 1)
         
         # Кнопка закрытия
@@ -737,6 +885,145 @@ class AboutDialog(QDialog):
 # Диалог настроек
 # =====================
 
+class ModelsTableModel(QAbstractTableModel):
+    """Таблица моделей для настроек: хранит датаклассы Model без виджетов на ячейку."""
+    
+    HEADERS = ["Активна", "Название", "API URL", "Model ID", ""]
+    COLUMN_ACTIVE, COLUMN_NAME, COLUMN_API_URL, COLUMN_API_ID, COLUMN_DELETE = range(5)
+    # Колонка -> поле Model для текстовых ячеек
+    TEXT_FIELDS = {COLUMN_NAME: "name", COLUMN_API_URL: "api_url", COLUMN_API_ID: "api_id"}
+    # Готовые размеры заголовков: ширина колонок не измеряется по содержимому
+    COLUMN_WIDTHS = {
+        COLUMN_ACTIVE: 70, COLUMN_NAME: 200, COLUMN_API_URL: 260, COLUMN_API_ID: 200, COLUMN_DELETE: 80
+    }
+    HEADER_HEIGHT = 34
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: List[Model] = []
+    
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal:
+            if role == Qt.ItemDataRole.DisplayRole:
+                return self.HEADERS[section]
+            if role == Qt.ItemDataRole.SizeHintRole:
+                return QSize(self.COLUMN_WIDTHS[section], self.HEADER_HEIGHT)
+        return super().headerData(section, orientation, role)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        model = self._rows[index.row()]
+        column = index.column()
+        if column == self.COLUMN_ACTIVE and role == Qt.ItemDataRole.CheckStateRole:
+            return Qt.CheckState.Checked if model.is_active else Qt.CheckState.Unchecked
+        if column in self.TEXT_FIELDS and role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return getattr(model, self.TEXT_FIELDS[column])
+        return None
+    
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole) -> bool:
+        if not index.isValid():
+            return False
+        model = self._rows[index.row()]
+        column = index.column()
+        if column == self.COLUMN_ACTIVE and role == Qt.ItemDataRole.CheckStateRole:
+            model.is_active = int(Qt.CheckState(value) == Qt.CheckState.Checked)
+        elif column in self.TEXT_FIELDS and role == Qt.ItemDataRole.EditRole:
+            setattr(model, self.TEXT_FIELDS[column], value)
+        else:
+            return False
+        self.dataChanged.emit(index, index, [role])
+        return True
+    
+    def flags(self, index):
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if index.column() == self.COLUMN_ACTIVE:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        elif index.column() in self.TEXT_FIELDS:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+    
+    def set_models(self, models: List[Model]):
+        """Заменить содержимое таблицы одним сбросом модели."""
+        self.beginResetModel()
+        self._rows = list(models)
+        self.endResetModel()
+    
+    def add_model(self, model: Model):
+        """Добавить строку в конец таблицы."""
+        row = len(self._rows)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.append(model)
+        self.endInsertRows()
+    
+    def remove_row(self, row: int):
+        """Удалить строку таблицы."""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        self.endRemoveRows()
+    
+    def models(self) -> List[Model]:
+        """Модели в порядке строк таблицы."""
+        return self._rows
+
+
+class CheckBoxDelegate(QStyledItemDelegate):
+    """Чекбокс по центру ячейки; переключается нажатием в любом месте ячейки."""
+    
+    def paint(self, painter, option, index):
+        checked = index.data(Qt.ItemDataRole.CheckStateRole) == Qt.CheckState.Checked
+        style = option.widget.style() if option.widget else QApplication.style()
+        checkbox = QStyleOptionButton()
+        checkbox.state = QStyle.StateFlag.State_Enabled | (
+            QStyle.StateFlag.State_On if checked else QStyle.StateFlag.State_Off
+        )
+        indicator = style.subElementRect(QStyle.SubElement.SE_CheckBoxIndicator, checkbox, option.widget)
+        indicator.moveCenter(option.rect.center())
+        checkbox.rect = indicator
+        style.drawControl(QStyle.ControlElement.CE_CheckBox, checkbox, painter, option.widget)
+    
+    def editorEvent(self, event, model, option, index) -> bool:
+        if (
+            event.type() == QEvent.Type.MouseButtonRelease
+            and event.button() == Qt.MouseButton.LeftButton
+            and option.rect.contains(event.position().toPoint())
+        ):
+            checked = index.data(Qt.ItemDataRole.CheckStateRole) == Qt.CheckState.Checked
+            new_state = Qt.CheckState.Unchecked if checked else Qt.CheckState.Checked
+            return model.setData(index, new_state, Qt.ItemDataRole.CheckStateRole)
+        return False
+
+
+class DeleteButtonDelegate(QStyledItemDelegate):
+    """Кнопка удаления, нарисованная в ячейке (без виджета на каждую строку)."""
+    
+    delete_requested = pyqtSignal(int)  # Номер строки
+    
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = option.rect.adjusted(4, 4, -4, -4)
+        button.text = "🗑️"
+        button.state = QStyle.StateFlag.State_Enabled
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_PushButton, button, painter, option.widget)
+    
+    def editorEvent(self, event, model, option, index) -> bool:
+        if (
+            event.type() == QEvent.Type.MouseButtonRelease
+            and event.button() == Qt.MouseButton.LeftButton
+            and option.rect.contains(event.position().toPoint())
+        ):
+            self.delete_requested.emit(index.row())
+            return True
+        return False
+
+
 class SettingsDialog(QDialog):
     """Диалог настроек приложения."""
     
@@ -748,6 +1035,9 @@ class SettingsDialog(QDialog):
         self.setMinimumSize(800, 600)
         self.resize(900, 650)
         
+        # Таблица моделей заполняется при первом открытии вкладки
+        self._models_loaded = False
+        
         self._setup_ui()
         self._load_data()
     
@@ -765,7 +1055,8 @@ class SettingsDialog(QDialog):
         
         # Вкладка "Модели"
         models_tab = self._create_models_tab()
-        self.tabs.addTab(models_tab, "🧠 Модели")
+        self._models_tab_index = self.tabs.addTab(models_tab, "🧠 Модели")
+        self.tabs.currentChanged.connect(self._on_tab_changed)
         
         layout.addWidget(self.tabs)
         
@@ -807,7 +1098,8 @@ class SettingsDialog(QDialog):
         
         # Таймаут
         timeout_group = QGroupBox("⏱️ Сеть")
-        timeout_layout = QHBoxLayout(timeout_group)
+        network_layout = QVBoxLayout(timeout_group)
+        timeout_layout = QHBoxLayout()
         
         timeout_label = QLabel("Таймаут запроса (сек):")
         timeout_layout.addWidget(timeout_label)
@@ -817,6 +1109,21 @@ class SettingsDialog(QDialog):
         self.timeout_spin.setValue(30)
         timeout_layout.addWidget(self.timeout_spin)
         timeout_layout.addStretch()
+        network_layout.addLayout(timeout_layout)
+        
+        # Одновременные запросы
+        concurrency_layout = QHBoxLayout()
+        concurrency_layout.addWidget(QLabel("Одновременных запросов:"))
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 64)
+        self.concurrency_spin.setValue(16)
+        concurrency_layout.addWidget(self.concurrency_spin)
+        concurrency_layout.addStretch()
+        network_layout.addLayout(concurrency_layout)
+        
+        # Кэш ответов
+        self.cache_checkbox = QCheckBox("Брать ответы на повторные промпты из истории")
+        network_layout.addWidget(self.cache_checkbox)
         
         layout.addWidget(timeout_group)
         layout.addStretch()
@@ -829,16 +1136,27 @@ class SettingsDialog(QDialog):
         layout = QVBoxLayout(widget)
         
         # Таблица моделей
-        self.models_table = QTableWidget()
-        self.models_table.setColumnCount(5)
-        self.models_table.setHorizontalHeaderLabels(["Активна", "Название", "API URL", "Model ID", ""])
-        self.models_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)
-        self.models_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-        self.models_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
-        self.models_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
-        self.models_table.horizontalHeader().setSectionResizeMode(4, QHeaderView.ResizeMode.Fixed)
-        self.models_table.setColumnWidth(0, 70)
-        self.models_table.setColumnWidth(4, 80)
+        self.models_model = ModelsTableModel(self)
+        self.models_table = QTableView()
+        self.models_table.setModel(self.models_model)
+        self.models_table.setSortingEnabled(False)
+        header = self.models_table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(4, QHeaderView.ResizeMode.Fixed)
+        # Размеры берутся только из видимых строк и подсказок заголовка
+        header.setResizeContentsPrecision(0)
+        self.models_table.verticalHeader().setResizeContentsPrecision(0)
+        self._apply_column_widths()
+        
+        # Чекбокс активности и кнопка удаления рисуются делегатами
+        self.active_delegate = CheckBoxDelegate(self.models_table)
+        self.models_table.setItemDelegateForColumn(ModelsTableModel.COLUMN_ACTIVE, self.active_delegate)
+        self.delete_delegate = DeleteButtonDelegate(self.models_table)
+        self.delete_delegate.delete_requested.connect(self._delete_model_row)
+        self.models_table.setItemDelegateForColumn(ModelsTableModel.COLUMN_DELETE, self.delete_delegate)
         layout.addWidget(self.models_table)
         
         # Кнопки управления
@@ -865,127 +1183,78 @@ class SettingsDialog(QDialog):
         
         # Таймаут
         self.timeout_spin.setValue(settings.request_timeout)
-        
-        # Модели
-        self._load_models()
+        self.concurrency_spin.setValue(settings.max_concurrent_requests)
+        self.cache_checkbox.setChecked(bool(settings.use_response_cache))
+    
+    def _on_tab_changed(self, index: int):
+        """Загрузка моделей при первом переходе на вкладку."""
+        if index == self._models_tab_index and not self._models_loaded:
+            self._load_models()
+            self._models_loaded = True
     
     def _load_models(self):
         """Загрузка списка моделей в таблицу."""
-        models = db.get_all_models()
-        self.models_table.setRowCount(len(models))
-        
-        for row, model in enumerate(models):
-            # Чекбокс активности
-            active_checkbox = QCheckBox()
-            active_checkbox.setChecked(model.is_active)
-            active_widget = QWidget()
-            active_layout = QHBoxLayout(active_widget)
-            active_layout.addWidget(active_checkbox)
-            active_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            active_layout.setContentsMargins(0, 0, 0, 0)
-            self.models_table.setCellWidget(row, 0, active_widget)
-            
-            # Название
-            name_item = QTableWidgetItem(model.name)
-            name_item.setData(Qt.ItemDataRole.UserRole, model.id)
-            self.models_table.setItem(row, 1, name_item)
-            
-            # API URL
-            self.models_table.setItem(row, 2, QTableWidgetItem(model.api_url))
-            
-            # Model ID
-            self.models_table.setItem(row, 3, QTableWidgetItem(model.api_id))
-            
-            # Кнопка удаления
-            delete_btn = QPushButton("🗑️")
-            delete_btn.setObjectName("secondary")
-            delete_btn.setFixedWidth(60)
-            delete_btn.clicked.connect(lambda checked, r=row: self._delete_model_row(r))
-            self.models_table.setCellWidget(row, 4, delete_btn)
+        # Сброс модели и пересчёт заголовков отрисовываются одним проходом
+        self.models_table.setUpdatesEnabled(False)
+        try:
+            self.models_model.set_models(db.get_all_models())
+            # Сброс модели возвращает колонкам ширину по умолчанию
+            self._apply_column_widths()
+        finally:
+            self.models_table.setUpdatesEnabled(True)
+    
+    def _apply_column_widths(self):
+        """Ширина колонок фиксированного размера."""
+        for column in (ModelsTableModel.COLUMN_ACTIVE, ModelsTableModel.COLUMN_DELETE):
+            self.models_table.setColumnWidth(column, ModelsTableModel.COLUMN_WIDTHS[column])
     
     def _add_model_row(self):
         """Добавить новую строку модели."""
-        row = self.models_table.rowCount()
-        self.models_table.insertRow(row)
-        
-        # Чекбокс активности
-        active_checkbox = QCheckBox()
-        active_checkbox.setChecked(True)
-        active_widget = QWidget()
-        active_layout = QHBoxLayout(active_widget)
-        active_layout.addWidget(active_checkbox)
-        active_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        active_layout.setContentsMargins(0, 0, 0, 0)
-        self.models_table.setCellWidget(row, 0, active_widget)
-        
-        # Пустые ячейки
-        name_item = QTableWidgetItem("")
-        name_item.setData(Qt.ItemDataRole.UserRole, None)  # Новая модель
-        self.models_table.setItem(row, 1, name_item)
-        self.models_table.setItem(row, 2, QTableWidgetItem("https://openrouter.ai/api/v1/chat/completions"))
-        self.models_table.setItem(row, 3, QTableWidgetItem(""))
-        
-        # Кнопка удаления
-        delete_btn = QPushButton("🗑️")
-        delete_btn.setObjectName("secondary")
-        delete_btn.setFixedWidth(60)
-        delete_btn.clicked.connect(lambda checked, r=row: self._delete_model_row(r))
-        self.models_table.setCellWidget(row, 4, delete_btn)
+        self.models_model.add_model(Model(
+            api_url="https://openrouter.ai/api/v1/chat/completions"
+        ))
     
     def _delete_model_row(self, row: int):
         """Удалить строку модели."""
-        name_item = self.models_table.item(row, 1)
-        if name_item:
-            model_id = name_item.data(Qt.ItemDataRole.UserRole)
-            if model_id:
-                reply = QMessageBox.question(
-                    self, "Подтверждение",
-                    "Удалить эту модель? Это действие нельзя отменить.",
-                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-                )
-                if reply == QMessageBox.StandardButton.Yes:
-                    db.delete_model(model_id)
-        self.models_table.removeRow(row)
+        model_id = self.models_model.models()[row].id
+        if model_id:
+            reply = QMessageBox.question(
+                self, "Подтверждение",
+                "Удалить эту модель? Это действие нельзя отменить.",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply == QMessageBox.StandardButton.Yes:
+                db.delete_model(model_id)
+        self.models_model.remove_row(row)
     
     def _save_settings(self):
         """Сохранить настройки."""
         # Сохраняем общие настройки
         settings = Settings(
             theme=self.theme_combo.currentData(),
-            request_timeout=self.timeout_spin.value()
+            request_timeout=self.timeout_spin.value(),
+            max_concurrent_requests=self.concurrency_spin.value(),
+            use_response_cache=int(self.cache_checkbox.isChecked())
         )
         db.save_settings(settings)
         
-        # Сохраняем модели
-        for row in range(self.models_table.rowCount()):
-            name_item = self.models_table.item(row, 1)
-            api_url_item = self.models_table.item(row, 2)
-            api_id_item = self.models_table.item(row, 3)
-            
-            if not name_item or not name_item.text().strip():
+        # Сохраняем модели одной транзакцией
+        to_update, to_insert = [], []
+        for row_model in self.models_model.models():
+            if not row_model.name.strip():
                 continue
             
-            # Получаем чекбокс активности
-            active_widget = self.models_table.cellWidget(row, 0)
-            is_active = False
-            if active_widget:
-                checkbox = active_widget.findChild(QCheckBox)
-                if checkbox:
-                    is_active = checkbox.isChecked()
-            
-            model_id = name_item.data(Qt.ItemDataRole.UserRole)
             model = Model(
-                id=model_id,
-                name=name_item.text().strip(),
-                api_url=api_url_item.text().strip() if api_url_item else "",
-                api_id=api_id_item.text().strip() if api_id_item else "",
-                is_active=is_active
+                id=row_model.id,
+                name=row_model.name.strip(),
+                api_url=row_model.api_url.strip(),
+                api_id=row_model.api_id.strip(),
+                is_active=row_model.is_active
             )
-            
-            if model_id:
-                db.update_model(model)
-            else:
-                db.create_model(model)
+            (to_update if model.id else to_insert).append(model)
+        
+        if to_update or to_insert:
+            db.save_models_bulk(to_update, to_insert)
         
         self.settings_changed.emit()
         self.accept()
@@ -1139,7 +1408,7 @@ class ImprovePromptDialog(QDialog):
         
         return frame
     
-    def set_results(self, result: ImprovedPrompt):
+    def set_results(self, result: "ImprovedPrompt"):
         """Установить результаты улучшения."""
         self.loading_label.hide()
         self.variants_widget.show()
@@ -1184,19 +1453,32 @@ class ImprovePromptDialog(QDialog):
 # Виджет карточки результата
 # =====================
 
+class ResultsPanel(QWidget):
+    """Контейнер карточек: сигналы всех карточек проходят через него,
+    окно подключается к панели один раз вместо подключения каждой карточки."""
+    
+    selection_changed = pyqtSignal(int, bool)  # result_id (0 - ещё не сохранён), is_selected
+    open_requested = pyqtSignal(object)  # Result
+
+
 class ResultCard(QFrame):
     """Карточка с ответом модели."""
     
-    selection_changed = pyqtSignal(int, bool)  # result_id, is_selected
-    
-    def __init__(self, result: Result, parent=None):
-        super().__init__(parent)
+    def __init__(self, result: Result, panel: ResultsPanel):
+        super().__init__(panel)
         self.result = result
+        self._panel = panel
         self.setObjectName("resultCard")
         self.setMinimumWidth(350)
         self.setMaximumWidth(450)
         self.setSizePolicy(QSizePolicy.Policy.Fixed, QSizePolicy.Policy.Expanding)
         
+        # Поле ответа создаётся, когда карточка впервые попадает на экран
+        self.response_text: Optional[QPlainTextEdit] = None
+        self._build_scheduled = False
+        self._text = result.response_text
+        self._error = False
+        
         self._setup_ui()
     
     def _setup_ui(self):
@@ -1206,9 +1488,9 @@ class ResultCard(QFrame):
         # Заголовок с названием модели
         header = QHBoxLayout()
         
-        model_label = QLabel(self.result.model_name or f"Модель #{self.result.model_id}")
-        model_label.setStyleSheet("font-size: 16px; font-weight: bold; color: #89b4fa;")
-        header.addWidget(model_label)
+        self.model_label = QLabel(self.result.model_name or f"Модель #{self.result.model_id}")
+        self.model_label.setStyleSheet("font-size: 16px; font-weight: bold; color: #89b4fa;")
+        header.addWidget(self.model_label)
         
         header.addStretch()
         
@@ -1221,62 +1503,169 @@ class ResultCard(QFrame):
         
         # Чекбокс выбора
         self.select_checkbox = QCheckBox("Избранное")
-        self.select_checkbox.setChecked(self.result.is_selected)
+        self.select_checkbox.setChecked(bool(self.result.is_selected))
         self.select_checkbox.stateChanged.connect(self._on_selection_changed)
         header.addWidget(self.select_checkbox)
         
         layout.addLayout(header)
         
-        # Текст ответа
-        self.response_text = QTextEdit()
-        self.response_text.setPlainText(self.result.response_text)
-        self.response_text.setReadOnly(True)
-        self.response_text.setMinimumHeight(400)
-        layout.addWidget(self.response_text)
+        # Текст ответа: до первой отрисовки - лёгкая подпись с началом ответа
+        self.preview_label = QLabel()
+        self.preview_label.setTextFormat(Qt.TextFormat.PlainText)
+        self.preview_label.setWordWrap(True)
+        self.preview_label.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        self.preview_label.setMinimumHeight(400)
+        layout.addWidget(self.preview_label)
+        self._show_text()
         
         # Обновляем стиль в зависимости от выбора
         self._update_style()
     
+    def bind(self, result: Result):
+        """Показать в карточке другой результат (повторное использование карточки)."""
+        self.result = result
+        self._text = result.response_text
+        self._error = False
+        self.model_label.setText(result.model_name or f"Модель #{result.model_id}")
+        # Смена результата - не выбор пользователя, сигнал не нужен
+        with QSignalBlocker(self.select_checkbox):
+            self.select_checkbox.setChecked(bool(result.is_selected))
+        self._show_text()
+        self._update_style()
+    
+    def paintEvent(self, event):
+        # Карточки за краем области прокрутки не отрисовываются,
+        # поэтому поле ответа строится только для видимых
+        super().paintEvent(event)
+        if self.response_text is None and not self._build_scheduled:
+            self._build_scheduled = True
+            QTimer.singleShot(0, self._build_response_text)
+    
+    def _build_response_text(self):
+        """Заменить подпись-заготовку полем с полным текстом ответа."""
+        self._build_scheduled = False
+        if self.response_text is not None or self.visibleRegion().isEmpty():
+            # Отрисовка пришлась на раскладку до позиционирования карточек
+            return
+        self.response_text = QPlainTextEdit()
+        self.response_text.setReadOnly(True)
+        self.response_text.setMaximumBlockCount(RESULT_MAX_BLOCKS)
+        self.response_text.setMinimumHeight(400)
+        self.layout().replaceWidget(self.preview_label, self.response_text)
+        self.preview_label.deleteLater()
+        self.preview_label = None
+        self._show_text()
+    
+    def _show_text(self):
+        """Вывести текущий текст в поле ответа или в подпись-заготовку."""
+        if self.response_text is not None:
+            widget = self.response_text
+            widget.setPlainText(self._text)
+        else:
+            widget = self.preview_label
+            widget.setText(self._text[:RESULT_PREVIEW_CHARS])
+        # Цвет ошибки задаёт правило темы по свойству "error"
+        if bool(widget.property("error")) != self._error:
+            widget.setProperty("error", self._error)
+            widget.style().unpolish(widget)
+            widget.style().polish(widget)
+    
     def _on_open_clicked(self):
-        """Открыть ответ в диалоге с форматированным markdown."""
-        title = self.result.model_name or f"Модель #{self.result.model_id}"
-        dialog = MarkdownViewerDialog(title, self.result.response_text, self)
-        dialog.exec()
+        """Запросить просмотр ответа с форматированным markdown."""
+        self._panel.open_requested.emit(self.result)
     
     def _on_selection_changed(self, state):
         is_selected = state == Qt.CheckState.Checked.value
-        self.result.is_selected = is_selected
+        self.result.is_selected = int(is_selected)
         self._update_style()
-        if self.result.id:
-            self.selection_changed.emit(self.result.id, is_selected)
+        self._panel.selection_changed.emit(self.result.id or 0, is_selected)
     
     def _update_style(self):
-        if self.result.is_selected:
-            self.setStyleSheet("""
-                QFrame#resultCard {
-                    background-color: #313244;
-                    border: 2px solid #a6e3a1;
-                    border-radius: 10px;
-                }
-            """)
-        else:
-            self.setStyleSheet("""
-                QFrame#resultCard {
-                    background-color: #313244;
-                    border: 1px solid #45475a;
-                    border-radius: 10px;
-                }
-            """)
+        # Рамка задаётся правилом QFrame#resultCard[selected="true"] темы;
+        # смена свойства требует только повторной полировки виджета
+        self.setProperty("selected", bool(self.result.is_selected))
+        self.style().unpolish(self)
+        self.style().polish(self)
     
     def set_response(self, text: str):
         """Установить текст ответа."""
         self.result.response_text = text
-        self.response_text.setPlainText(text)
+        self._text = text
+        self._error = False
+        self._show_text()
     
     def set_error(self, error: str):
         """Показать ошибку."""
-        self.response_text.setPlainText(f"❌ Ошибка: {error}")
-        self.response_text.setStyleSheet("color: #f38ba8;")
+        self._text = f"❌ Ошибка: {error}"
+        self._error = True
+        self._show_text()
+
+
+class PromptListModel(QAbstractListModel):
+    """Строки истории для выпадающего списка: пары (id, подпись) без объекта на строку.
+    
+    Промпты читаются страницами по HISTORY_PAGE_SIZE: следующую страницу
+    список запрашивает через fetchMore, когда его прокручивают до конца.
+    """
+    
+    NEW_PROMPT_TEXT = "-- Новый промпт --"
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: List[tuple] = [(None, self.NEW_PROMPT_TEXT)]
+        self._filter = ("", "", "")
+        self._has_more = False
+    
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        prompt_id, display_text = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return display_text
+        if role == Qt.ItemDataRole.UserRole:
+            return prompt_id
+        return None
+    
+    def _fetch_page(self, offset: int) -> List[tuple]:
+        """Прочитать страницу превью для текущего фильтра."""
+        search, date_from, date_to = self._filter
+        previews = db.get_prompt_previews(
+            search=search, date_from=date_from, date_to=date_to,
+            limit=HISTORY_PAGE_SIZE, offset=offset
+        )
+        self._has_more = len(previews) == HISTORY_PAGE_SIZE
+        return previews
+    
+    def set_filter(self, search: str = "", date_from: str = "", date_to: str = ""):
+        """Загрузить первую страницу под новый фильтр одним сбросом модели."""
+        self._filter = (search, date_from, date_to)
+        previews = self._fetch_page(0)
+        self.beginResetModel()
+        self._rows = [(None, self.NEW_PROMPT_TEXT)]
+        self._rows.extend(previews)
+        self.endResetModel()
+    
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._has_more
+    
+    def fetchMore(self, parent=QModelIndex()):
+        # Первая строка - «новый промпт», остальные - уже загруженные промпты
+        previews = self._fetch_page(len(self._rows) - 1)
+        if not previews:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(previews) - 1)
+        self._rows.extend(previews)
+        self.endInsertRows()
+
+
+@lru_cache(maxsize=256)
+def _cached_prompt(prompt_id: int) -> Optional[Prompt]:
+    """Промпт по ID; записи prompts не изменяются, поэтому кэш не сбрасывается."""
+    return db.get_prompt(prompt_id)
 
 
 # =====================
@@ -1291,15 +1680,49 @@ class MainWindow(QMainWindow):
         
         self.current_prompt_id: Optional[int] = None
         self.result_cards: List[ResultCard] = []
+        # Все созданные карточки; показаны первые len(result_cards)
+        self._card_pool: List[ResultCard] = []
+        self._model_checkbox_pool: List[QCheckBox] = []
         self.api_worker: Optional[APIWorker] = None
         self.improve_worker: Optional[ImproveWorker] = None
+        self.export_worker: Optional[ExportWorker] = None
         self.improve_dialog: Optional[ImprovePromptDialog] = None
         self.current_theme: str = "dark"
         
+        # Число отмеченных карточек на панели результатов
+        self._selected_count = 0
+        
+        # Отложенные изменения «Избранного»: {result_id: is_selected}
+        self._pending_selection: Dict[int, bool] = {}
+        self._selection_timer = QTimer(self)
+        self._selection_timer.setSingleShot(True)
+        self._selection_timer.setInterval(SELECTION_FLUSH_DELAY_MS)
+        self._selection_timer.timeout.connect(self._flush_selection_changes)
+        
+        # Поиск и фильтр дат применяются только после паузы во вводе;
+        # _last_filter - последний загруженный (поиск, дата с, дата по)
+        self._last_filter: Optional[tuple] = None
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_timer.timeout.connect(self._apply_filters)
+        
+        # Готовые диалоги просмотра по ID результата (LRU)
+        self._viewer_cache: "OrderedDict[int, MarkdownViewerDialog]" = OrderedDict()
+        
         self._setup_window()
         self._setup_ui()
         self._load_data()
         self._apply_theme()
+        
+        # Периодическое обновление статистики БД в долгих сессиях
+        self.optimize_timer = QTimer(self)
+        self.optimize_timer.setInterval(DB_OPTIMIZE_INTERVAL_MS)
+        self.optimize_timer.timeout.connect(db.optimize)
+        self.optimize_timer.start()
+        
+        # DNS и TLS-рукопожатия с API - в фоне, уже после показа окна
+        QTimer.singleShot(NETWORK_WARMUP_DELAY_MS, self._warm_up_network)
     
     def _setup_window(self):
         """Настройка окна."""
@@ -1310,10 +1733,14 @@ class MainWindow(QMainWindow):
         """Применить тему."""
         settings = db.get_all_settings()
         self.current_theme = settings.theme
-        if self.current_theme == "light":
-            self.setStyleSheet(LIGHT_STYLE)
-        else:
-            self.setStyleSheet(DARK_STYLE)
+        self._set_app_style()
+    
+    def _set_app_style(self):
+        """Установить таблицу стилей текущей темы для всего приложения."""
+        style = APP_STYLES["light" if self.current_theme == "light" else "dark"]
+        app = QApplication.instance()
+        if app.styleSheet() != style:
+            app.setStyleSheet(style)
     
     def _setup_ui(self):
         """Создание интерфейса."""
@@ -1406,6 +1833,8 @@ class MainWindow(QMainWindow):
         
         self.history_combo = QComboBox()
         self.history_combo.setMinimumWidth(200)
+        self._history_model = PromptListModel(self.history_combo)
+        self.history_combo.setModel(self._history_model)
         self.history_combo.currentIndexChanged.connect(self._on_history_selected)
         history_layout.addWidget(self.history_combo, 1)
         
@@ -1522,21 +1951,25 @@ class MainWindow(QMainWindow):
         layout.addLayout(header)
         
         # Область прокрутки для карточек
-        scroll_area = QScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
-        scroll_area.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.results_scroll = QScrollArea()
+        self.results_scroll.setWidgetResizable(True)
+        self.results_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.results_scroll.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        
+        self._create_results_container()
+        layout.addWidget(self.results_scroll, 1)
         
-        # Контейнер для карточек
-        self.results_container = QWidget()
+        return panel
+    
+    def _create_results_container(self):
+        """Создать пустой контейнер для карточек в области прокрутки."""
+        self.results_container = ResultsPanel()
+        self.results_container.selection_changed.connect(self._on_result_selection_changed)
+        self.results_container.open_requested.connect(self._open_result_viewer)
         self.results_layout = QHBoxLayout(self.results_container)
         self.results_layout.setSpacing(15)
         self.results_layout.setAlignment(Qt.AlignmentFlag.AlignLeft)
-        
-        scroll_area.setWidget(self.results_container)
-        layout.addWidget(scroll_area, 1)
-        
-        return panel
+        self.results_scroll.setWidget(self.results_container)
     
     def _create_actions_panel(self) -> QWidget:
         """Создание панели действий."""
@@ -1569,10 +2002,11 @@ class MainWindow(QMainWindow):
         export_json_btn.clicked.connect(self._export_json)
         layout.addWidget(export_json_btn)
         
-        # Кнопка сохранения избранных
-        save_selected_btn = QPushButton("💾 Сохранить избранные")
-        save_selected_btn.clicked.connect(self._save_selected)
-        layout.addWidget(save_selected_btn)
+        # Кнопка сохранения избранных (активна, пока есть отмеченные)
+        self.save_selected_btn = QPushButton("💾 Сохранить избранные")
+        self.save_selected_btn.setEnabled(False)
+        self.save_selected_btn.clicked.connect(self._save_selected)
+        layout.addWidget(self.save_selected_btn)
         
         return panel
     
@@ -1583,51 +2017,41 @@ class MainWindow(QMainWindow):
     
     def _load_models(self):
         """Загрузка списка моделей."""
-        # Очищаем контейнер
-        while self.models_container.count():
-            item = self.models_container.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
-        
         # Загружаем модели из БД
         models = db.get_all_models()
         self.model_checkboxes = {}
-        
-        for model in models:
-            checkbox = QCheckBox(model.name)
-            checkbox.setChecked(model.is_active)
+        self._models_by_id: Dict[int, Model] = {model.id: model for model in models}
+        
+        # Уже созданные чекбоксы переиспользуются, лишние скрываются
+        for index, model in enumerate(models):
+            if index < len(self._model_checkbox_pool):
+                checkbox = self._model_checkbox_pool[index]
+                checkbox.setText(model.name)
+                checkbox.show()
+            else:
+                checkbox = QCheckBox(model.name)
+                self._model_checkbox_pool.append(checkbox)
+                self.models_container.addWidget(checkbox)
+            checkbox.setChecked(bool(model.is_active))
             checkbox.model_id = model.id
             self.model_checkboxes[model.id] = checkbox
-            self.models_container.addWidget(checkbox)
+        for checkbox in self._model_checkbox_pool[len(models):]:
+            checkbox.hide()
     
     def _load_history(self, search: str = "", date_from: str = "", date_to: str = ""):
         """Загрузка истории промптов."""
-        self.history_combo.blockSignals(True)
-        self.history_combo.clear()
-        self.history_combo.addItem("-- Новый промпт --", None)
-        
-        prompts = db.get_all_prompts(search=search, date_from=date_from, date_to=date_to)
-        for prompt in prompts:
-            # Обрезаем длинный текст
-            display_text = prompt.text[:50] + "..." if len(prompt.text) > 50 else prompt.text
-            display_text = display_text.replace("\n", " ")
-            # Добавляем дату
-            if prompt.created_at:
-                try:
-                    dt = datetime.fromisoformat(str(prompt.created_at).replace(" ", "T"))
-                    display_text = f"[{dt.strftime('%d.%m')}] {display_text}"
-                except:
-                    pass
-            self.history_combo.addItem(display_text, prompt.id)
-        
-        self.history_combo.blockSignals(False)
+        # Короткие строки с датой готовит SQLite; полный текст - только при выборе.
+        # Модель сбрасывается один раз, без сигналов выбора на каждую строку
+        with QSignalBlocker(self.history_combo):
+            self._history_model.set_filter(search, date_from, date_to)
+            self.history_combo.setCurrentIndex(0)
     
     def _on_filter_changed(self):
-        """Обработчик изменения фильтров."""
-        self._update_history_filter()
+        """Обработчик изменения фильтров (перезапускает таймер ожидания)."""
+        self._search_timer.start()
     
-    def _update_history_filter(self):
-        """Обновить историю с учётом фильтров."""
+    def _history_filter(self) -> tuple:
+        """Текущий фильтр истории: (поиск, дата с, дата по)."""
         search = self.search_input.text()
         date_from = ""
         date_to = ""
@@ -1636,13 +2060,19 @@ class MainWindow(QMainWindow):
             date_from = self.date_from.date().toString("yyyy-MM-dd")
             date_to = self.date_to.date().toString("yyyy-MM-dd")
         
+        return search, date_from, date_to
+    
+    def _update_history_filter(self):
+        """Обновить историю с учётом фильтров."""
+        self._last_filter = self._history_filter()
+        search, date_from, date_to = self._last_filter
         self._load_history(search=search, date_from=date_from, date_to=date_to)
     
     def _on_history_selected(self, index: int):
         """Обработчик выбора промпта из истории."""
         prompt_id = self.history_combo.currentData()
         if prompt_id:
-            prompt = db.get_prompt(prompt_id)
+            prompt = _cached_prompt(prompt_id)
             if prompt:
                 self.prompt_input.setPlainText(prompt.text)
                 self.current_prompt_id = prompt_id
@@ -1655,61 +2085,138 @@ class MainWindow(QMainWindow):
     def _load_results_for_prompt(self, prompt_id: int):
         """Загрузка результатов для промпта."""
         self._clear_results()
-        
-        results = db.get_results_for_prompt(prompt_id)
-        for result in results:
-            self._add_result_card(result)
+        self._add_result_cards(db.get_results_for_prompt(prompt_id))
     
     def _clear_results(self):
         """Очистка панели результатов."""
-        while self.results_layout.count():
-            item = self.results_layout.takeAt(0)
-            if item.widget():
-                item.widget().deleteLater()
+        # Карточки не удаляются, а скрываются и ждут повторного использования
+        self.results_container.setUpdatesEnabled(False)
+        try:
+            for card in self.result_cards:
+                card.hide()
+        finally:
+            self.results_container.setUpdatesEnabled(True)
         self.result_cards.clear()
+        self._set_selected_count(0)
     
     def _add_result_card(self, result: Result) -> ResultCard:
-        """Добавить карточку результата."""
-        card = ResultCard(result)
-        card.selection_changed.connect(self._on_result_selection_changed)
-        self.results_layout.addWidget(card)
+        """Добавить карточку результата (свободная карточка из пула или новая)."""
+        if len(self.result_cards) < len(self._card_pool):
+            card = self._card_pool[len(self.result_cards)]
+            card.bind(result)
+            card.show()
+        else:
+            card = ResultCard(result, self.results_container)
+            self.results_layout.addWidget(card)
+            self._card_pool.append(card)
         self.result_cards.append(card)
+        if result.is_selected:
+            self._set_selected_count(self._selected_count + 1)
         return card
     
+    def _open_result_viewer(self, result: Result):
+        """Показать ответ в диалоге; для сохранённых ответов диалог переиспользуется."""
+        dialog = self._viewer_cache.get(result.id) if result.id else None
+        if dialog is None:
+            title = result.model_name or f"Модель #{result.model_id}"
+            dialog = MarkdownViewerDialog(title, result.response_text, self)
+            if result.id:
+                self._viewer_cache[result.id] = dialog
+                if len(self._viewer_cache) > VIEWER_CACHE_SIZE:
+                    _, evicted = self._viewer_cache.popitem(last=False)
+                    evicted.deleteLater()
+        elif result.id:
+            self._viewer_cache.move_to_end(result.id)
+        dialog.exec()
+        if not result.id:
+            dialog.deleteLater()
+    
+    def _add_result_cards(self, results: List[Result]) -> List[ResultCard]:
+        """Добавить карточки пачкой: панель перерисовывается один раз в конце."""
+        self.results_container.setUpdatesEnabled(False)
+        try:
+            return [self._add_result_card(result) for result in results]
+        finally:
+            self.results_container.setUpdatesEnabled(True)
+    
+    def _set_selected_count(self, count: int):
+        """Обновить счётчик отмеченных карточек и доступность кнопки сохранения."""
+        self._selected_count = count
+        self.save_selected_btn.setEnabled(count > 0)
+    
     def _on_result_selection_changed(self, result_id: int, is_selected: bool):
-        """Обработчик изменения выбора результата."""
-        db.update_result_selection(result_id, is_selected)
+        """Обработчик изменения выбора результата (запись в БД откладывается)."""
+        self._set_selected_count(self._selected_count + (1 if is_selected else -1))
+        if result_id:
+            self._queue_selection_change(result_id, is_selected)
+    
+    def _queue_selection_change(self, result_id: int, is_selected: bool):
+        """Запомнить изменение «Избранного» для записи в БД."""
+        self._pending_selection[result_id] = is_selected
+        self._selection_timer.start()
+    
+    def _flush_selection_changes(self):
+        """Записать накопленные изменения «Избранного» двумя запросами."""
+        self._selection_timer.stop()
+        if not self._pending_selection:
+            return
+        selected = [rid for rid, value in self._pending_selection.items() if value]
+        deselected = [rid for rid, value in self._pending_selection.items() if not value]
+        self._pending_selection.clear()
+        if selected:
+            db.update_results_selection(selected, True)
+        if deselected:
+            db.update_results_selection(deselected, False)
+    
+    def _warm_up_network(self):
+        """Заранее соединиться с API активных моделей."""
+        from network import run_coroutine, warm_up
+        
+        urls = [model.api_url for model in self._models_by_id.values() if model.is_active]
+        if urls:
+            run_coroutine(warm_up(urls))
+    
+    def closeEvent(self, event):
+        """Сохранить отложенные изменения перед закрытием окна."""
+        self._flush_selection_changes()
+        super().closeEvent(event)
     
     def _get_selected_models(self) -> List[Model]:
-        """Получить список выбранных моделей."""
-        selected = []
-        for model_id, checkbox in self.model_checkboxes.items():
-            if checkbox.isChecked():
-                model = db.get_model(model_id)
-                if model:
-                    selected.append(model)
-        return selected
+        """Получить список выбранных моделей (из загруженных в _load_models)."""
+        return [
+            self._models_by_id[model_id]
+            for model_id, checkbox in self.model_checkboxes.items()
+            if checkbox.isChecked()
+        ]
     
     def _select_all_models(self):
         """Выбрать все модели."""
-        for checkbox in self.model_checkboxes.values():
-            checkbox.setChecked(True)
+        self._set_all_models_checked(True)
     
     def _deselect_all_models(self):
         """Снять выбор со всех моделей."""
-        for checkbox in self.model_checkboxes.values():
-            checkbox.setChecked(False)
+        self._set_all_models_checked(False)
+    
+    def _set_all_models_checked(self, checked: bool):
+        """Отметить все чекбоксы моделей с одной перерисовкой списка."""
+        models_widget = self.models_container.parentWidget()
+        models_widget.setUpdatesEnabled(False)
+        try:
+            for checkbox in self.model_checkboxes.values():
+                if checkbox.isChecked() != checked:
+                    checkbox.setChecked(checked)
+        finally:
+            models_widget.setUpdatesEnabled(True)
     
     def _toggle_theme(self):
         """Переключить тему."""
         if self.current_theme == "dark":
             self.current_theme = "light"
-            self.setStyleSheet(LIGHT_STYLE)
             self.theme_btn.setText("☀️")
         else:
             self.current_theme = "dark"
-            self.setStyleSheet(DARK_STYLE)
             self.theme_btn.setText("🌙")
+        self._set_app_style()
         
         # Сохраняем в настройки
         db.set_setting("theme", self.current_theme)
@@ -1831,7 +2338,7 @@ class MainWindow(QMainWindow):
         
         self.improve_dialog.exec()
     
-    def _on_improve_finished(self, result: ImprovedPrompt):
+    def _on_improve_finished(self, result: "ImprovedPrompt"):
         """Обработчик завершения улучшения промта."""
         if self.improve_dialog:
             self.improve_dialog.set_results(result)
@@ -1853,6 +2360,13 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Внимание", "Выберите хотя бы одну модель")
             return
         
+        settings = db.get_all_settings()
+        
+        # Ответы на такой же промпт, уже сохранённые в истории
+        cached = {}
+        if settings.use_response_cache:
+            cached = db.get_cached_responses(prompt_text, [model.id for model in selected_models])
+        
         # Сохраняем промпт в БД
         prompt = Prompt(text=prompt_text)
         prompt_id = db.create_prompt(prompt)
@@ -1862,27 +2376,56 @@ class MainWindow(QMainWindow):
         self._clear_results()
         
         # Создаём пустые карточки для каждой модели
-        model_cards = {}
-        for model in selected_models:
-            result = Result(
+        cards = self._add_result_cards([
+            Result(
                 prompt_id=prompt_id,
                 model_id=model.id,
                 response_text="⏳ Загрузка...",
                 model_name=model.name
             )
-            card = self._add_result_card(result)
-            model_cards[model.id] = card
+            for model in selected_models
+        ])
+        # Карточки из пула могут быть заняты другим промптом до прихода ответа,
+        # поэтому вместе с карточкой запоминаем её результат
+        model_cards = {card.result.model_id: (card, card.result) for card in cards}
+        
+        # Ответы из кэша сразу привязываем к новому промпту
+        if cached:
+            cached_ids = db.create_results_bulk([
+                Result(prompt_id=prompt_id, model_id=model_id, response_text=text)
+                for model_id, text in cached.items()
+            ])
+            for (model_id, text), result_id in zip(cached.items(), cached_ids):
+                card, _ = model_cards[model_id]
+                card.set_response(text)
+                card.result.id = result_id
+        
+        missing_models = [model for model in selected_models if model.id not in cached]
+        if not missing_models:
+            self.status_label.setText(f"Получено {len(cached)} ответов из истории")
+            self._update_history_filter()
+            return
         
         # Блокируем кнопку
         self.send_button.setEnabled(False)
         self.send_button.setText("⏳ Отправка...")
         self.status_label.setText("Отправка запросов...")
         
-        # Запускаем фоновый поток
-        settings = db.get_all_settings()
-        self.api_worker = APIWorker(selected_models, prompt_text, settings.request_timeout)
+        # Запускаем фоновую задачу только для моделей без сохранённого ответа
+        self.api_worker = APIWorker(
+            missing_models,
+            prompt_text,
+            prompt_id,
+            settings.request_timeout,
+            settings.max_concurrent_requests,
+            bool(settings.use_response_cache)
+        )
+        self.api_worker.result_ready.connect(
+            lambda model_id, response: self._on_api_result(model_id, response, model_cards)
+        )
+        self.api_worker.progress.connect(self.status_label.setText)
         self.api_worker.finished.connect(
-            lambda results: self._on_api_finished(results, model_cards, prompt_id)
+            lambda results, result_ids: self._on_api_finished(results, result_ids, model_cards)
         )
         self.api_worker.error.connect(self._on_api_error)
         self.api_worker.start()
@@ -1890,29 +2433,39 @@ class MainWindow(QMainWindow):
         # Обновляем историю
         self._update_history_filter()
     
-    def _on_api_finished(self, results: dict, model_cards: dict, prompt_id: int):
-        """Обработчик завершения API запросов."""
-        for model_id, response in results.items():
-            card = model_cards.get(model_id)
+    @staticmethod
+    def _bound_card(model_cards: dict, model_id: int) -> Optional[ResultCard]:
+        """Карточка модели, если она всё ещё показывает результат этого запроса."""
+        card, result = model_cards.get(model_id, (None, None))
+        if card is None or card.result is not result:
+            return None
+        return card
+    
+    def _on_api_result(self, model_id: int, response: "APIResponse", model_cards: dict):
+        """Показать ответ модели, не дожидаясь остальных."""
+        card = self._bound_card(model_cards, model_id)
+        if not card:
+            return
+        
+        if response.success:
+            card.set_response(response.content)
+        else:
+            card.set_error(response.error or "Неизвестная ошибка")
+    
+    def _on_api_finished(self, results: dict, result_ids: dict, model_cards: dict):
+        """Обработчик завершения API запросов (ответы уже сохранены в БД)."""
+        for model_id, result_id in result_ids.items():
+            card = self._bound_card(model_cards, model_id)
             if not card:
                 continue
-            
-            if response.success:
-                card.set_response(response.content)
-                # Сохраняем в БД
-                result = Result(
-                    prompt_id=prompt_id,
-                    model_id=model_id,
-                    response_text=response.content
-                )
-                result_id = db.create_result(result)
-                card.result.id = result_id
-            else:
-                card.set_error(response.error or "Неизвестная ошибка")
+            card.result.id = result_id
+            # Отметка «Избранное», поставленная до сохранения, ещё не записана
+            if card.result.is_selected:
+                self._queue_selection_change(result_id, True)
         
         self.send_button.setEnabled(True)
         self.send_button.setText("🚀 Отправить")
-        self.status_label.setText(f"Получено {len(results)} ответов")
+        self.status_label.setText(f"Получено {len(model_cards)} ответов")
     
     def _on_api_error(self, error: str):
         """Обработчик ошибки API."""
@@ -1922,7 +2475,13 @@ class MainWindow(QMainWindow):
         self.status_label.setText("")
     
     def _on_search_changed(self, text: str):
-        """Обработчик изменения поиска."""
+        """Обработчик изменения поиска (перезапускает таймер ожидания)."""
+        self._search_timer.start()
+    
+    def _apply_filters(self):
+        """Перезагрузить историю, если поиск или даты изменились с прошлого запроса."""
+        if self._history_filter() == self._last_filter:
+            return
         self._update_history_filter()
     
     def _export_markdown(self):
@@ -1934,19 +2493,6 @@ class MainWindow(QMainWindow):
         # Получаем текущий промпт
         prompt_text = self.prompt_input.toPlainText().strip()
         
-        # Формируем Markdown
-        md_content = f"# Сравнение ответов LLM\n\n"
-        md_content += f"**Дата:** {datetime.now().strftime('%d.%m.%Y %H:%M')}\n\n"
-        md_content += f"## Промпт\n\n```\n{prompt_text}\n```\n\n"
-        md_content += f"## Ответы моделей\n\n"
-        
-        for card in self.result_cards:
-            model_name = card.result.model_name or f"Модель #{card.result.model_id}"
-            selected = "⭐ " if card.result.is_selected else ""
-            md_content += f"### {selected}{model_name}\n\n"
-            md_content += f"{card.result.response_text}\n\n"
-            md_content += "---\n\n"
-        
         # Сохраняем файл
         file_path, _ = QFileDialog.getSaveFileName(
             self, "Сохранить Markdown", 
@@ -1955,9 +2501,27 @@ class MainWindow(QMainWindow):
         )
         
         if file_path:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(md_content)
-            QMessageBox.information(self, "Успех", f"Файл сохранён:\n{file_path}")
+            # Снимок карточек: сам текст собирается уже в потоке экспорта
+            results = [
+                (card.result.model_name or f"Модель #{card.result.model_id}",
+                 bool(card.result.is_selected), card.result.response_text)
+                for card in self.result_cards
+            ]
+            self._start_export(file_path, self._markdown_chunks(prompt_text, results))
+    
+    @staticmethod
+    def _markdown_chunks(prompt_text: str, results: List[tuple]) -> Iterator[str]:
+        """Части Markdown-файла экспорта; results - (модель, избранное, ответ)."""
+        yield "# Сравнение ответов LLM\n\n"
+        yield f"**Дата:** {datetime.now().strftime('%d.%m.%Y %H:%M')}\n\n"
+        yield f"## Промпт\n\n```\n{prompt_text}\n```\n\n"
+        yield "## Ответы моделей\n\n"
+        
+        for model_name, is_selected, response_text in results:
+            selected = "⭐ " if is_selected else ""
+            yield f"### {selected}{model_name}\n\n"
+            yield f"{response_text}\n\n"
+            yield "---\n\n"
     
     def _export_json(self):
         """Экспорт результатов в JSON."""
@@ -1980,7 +2544,7 @@ class MainWindow(QMainWindow):
                 "model_name": card.result.model_name or f"Model #{card.result.model_id}",
                 "model_id": card.result.model_id,
                 "response": card.result.response_text,
-                "is_selected": card.result.is_selected
+                "is_selected": bool(card.result.is_selected)
             })
         
         # Сохраняем файл
@@ -1991,13 +2555,35 @@ class MainWindow(QMainWindow):
         )
         
         if file_path:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, ensure_ascii=False, indent=2)
-            QMessageBox.information(self, "Успех", f"Файл сохранён:\n{file_path}")
+            # Большие выгрузки - компактно: файл меньше, кодировщик быстрее
+            if len(self.result_cards) > JSON_COMPACT_THRESHOLD:
+                encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+            else:
+                encoder = json.JSONEncoder(ensure_ascii=False, indent=2)
+            self._start_export(file_path, encoder.iterencode(export_data))
+    
+    def _start_export(self, file_path: str, chunks: Iterable[str]):
+        """Запустить запись экспорта в фоновом потоке."""
+        self.export_worker = ExportWorker(file_path, chunks, self)
+        self.export_worker.saved.connect(self._on_export_saved)
+        self.export_worker.failed.connect(self._on_export_failed)
+        self.export_worker.finished.connect(self.export_worker.deleteLater)
+        self.status_label.setText("Экспорт...")
+        self.export_worker.start()
+    
+    def _on_export_saved(self, file_path: str):
+        """Обработчик завершения экспорта."""
+        self.status_label.setText("")
+        QMessageBox.information(self, "Успех", f"Файл сохранён:\n{file_path}")
+    
+    def _on_export_failed(self, error: str):
+        """Обработчик ошибки записи экспорта."""
+        self.status_label.setText("")
+        QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить файл:\n{error}")
     
     def _save_selected(self):
         """Сохранить избранные результаты."""
-        selected_count = sum(1 for card in self.result_cards if card.result.is_selected)
+        selected_count = self._selected_count
         if selected_count == 0:
             QMessageBox.information(self, "Информация", "Нет избранных результатов для сохранения")
             return
@@ -2009,17 +2595,30 @@ class MainWindow(QMainWindow):
         )
 
 
+def _shutdown_network():
+    """Закрыть сетевые ресурсы, если сетевой модуль успел загрузиться."""
+    network = sys.modules.get("network")
+    if network is not None:
+        network.shutdown()
+
+
 def main():
     """Точка входа в приложение."""
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
     
+    # Создание схемы БД при первом запуске или после обновления
+    db.ensure_initialized()
+    
     # Установка иконки приложения
     import os
     icon_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.ico")
     if os.path.exists(icon_path):
         app.setWindowIcon(QIcon(icon_path))
     
+    # Закрыть общие HTTP-соединения перед выходом
+    app.aboutToQuit.connect(_shutdown_network)
+    
     window = MainWindow()
     window.show()
     
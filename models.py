@@ -8,7 +8,7 @@ from datetime import datetime
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Prompt:
     """Промпт пользователя."""
     
@@ -22,7 +22,7 @@ class Prompt:
             self.created_at = datetime.now()
 
 
-@dataclass
+@dataclass(slots=True)
 class Model:
     """LLM-модель для тестирования."""
     
@@ -30,10 +30,11 @@ class Model:
     name: str = ""
     api_url: str = ""
     api_id: str = ""
-    is_active: bool = True
+    # Флаги хранятся как 0/1, как в SQLite; bool() - только на границе с UI
+    is_active: int = 1
 
 
-@dataclass
+@dataclass(slots=True)
 class Result:
     """Результат тестирования - ответ модели на промпт."""
     
@@ -41,7 +42,7 @@ class Result:
     prompt_id: int = 0
     model_id: int = 0
     response_text: str = ""
-    is_selected: bool = False
+    is_selected: int = 0
     created_at: Optional[datetime] = None
     
     # Дополнительные поля для отображения (не хранятся в БД)
@@ -53,11 +54,14 @@ class Result:
             self.created_at = datetime.now()
 
 
-@dataclass
+@dataclass(slots=True)
 class Settings:
     """Настройки приложения."""
     
     theme: str = "dark"
     default_author: str = "user"
     request_timeout: int = 30
+    max_concurrent_requests: int = 16
+    # Повторный промпт берёт ответ модели из БД вместо запроса к API
+    use_response_cache: int = 1
 
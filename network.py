@@ -6,7 +6,13 @@
 import os
 import sys
 import asyncio
-from typing import Optional, AsyncGenerator, Callable
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import Future
+from typing import Optional, AsyncGenerator, Callable, Coroutine, Iterable
+from urllib.parse import urlsplit
 from dataclasses import dataclass
 from enum import Enum
 
@@ -31,6 +37,151 @@ env_path = os.path.join(get_app_dir(), '.env')
 load_dotenv(env_path)
 
 
+# Постоянный цикл событий для всех сетевых запросов приложения
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread: Optional[threading.Thread] = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Получить общий цикл событий, работающий в фоновом потоке.
+    
+    Цикл создаётся один раз и живёт до выхода из приложения, поэтому
+    запросы не платят за его создание и могут переиспользовать соединения.
+    """
+    global _loop, _loop_thread
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            _loop_thread = threading.Thread(
+                target=_loop.run_forever,
+                name="network-loop",
+                daemon=True
+            )
+            _loop_thread.start()
+    return _loop
+
+
+def run_coroutine(coro: Coroutine) -> Future:
+    """Запланировать корутину в общем цикле событий (из любого потока)."""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+
+
+# HTTP/2 (мультиплексирование запросов к одному хосту в одном соединении)
+# требует пакет h2 - без него клиент работает по HTTP/1.1
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# orjson разбирает JSON (в том числе прямо из bytes) быстрее стандартного
+# модуля; без него используется json из стандартной библиотеки
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ImportError:
+    import json
+    json_loads = json.loads
+    
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+# Метка на месте текста промпта в закэшированных шаблонах тела запроса
+_PROMPT_SENTINEL = "\x00prompt\x00"
+_PROMPT_SENTINEL_JSON = json_dumps(_PROMPT_SENTINEL)
+
+# Общий HTTP-клиент: TCP/TLS-соединения к одним и тем же API
+# переиспользуются между запросами и отправками
+HTTP_LIMITS = httpx.Limits(
+    max_connections=64,
+    max_keepalive_connections=32,
+    keepalive_expiry=60
+)
+_http_client: Optional[httpx.AsyncClient] = None
+_http_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Получить общий httpx-клиент для текущего цикла событий.
+    
+    Соединения клиента привязаны к циклу, поэтому для другого цикла
+    (не из get_event_loop) создаётся новый клиент, а прежний закрывается
+    в своём цикле, если тот ещё работает.
+    """
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client_loop is not loop:
+        if _http_client is not None and _http_client_loop.is_running():
+            asyncio.run_coroutine_threadsafe(_http_client.aclose(), _http_client_loop)
+        _http_client = httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=HTTP_LIMITS)
+        _http_client_loop = loop
+    return _http_client
+
+
+async def close_http_client():
+    """Закрыть общий HTTP-клиент."""
+    global _http_client, _http_client_loop
+    if _http_client is not None:
+        client, _http_client, _http_client_loop = _http_client, None, None
+        await client.aclose()
+
+
+# Таймаут прогревающего запроса к хосту API (с)
+WARMUP_TIMEOUT = 2.0
+
+
+async def warm_up(api_urls: Iterable[str], timeout: float = WARMUP_TIMEOUT):
+    """Заранее установить соединения с хостами API.
+    
+    HEAD-запрос к корню каждого хоста проходит DNS, TCP и TLS и оставляет
+    соединение в пуле общего клиента, так что первый промпт за них не платит.
+    Ошибки игнорируются: недоступный хост проявится при настоящем запросе.
+    """
+    origins = set()
+    for url in api_urls:
+        parts = urlsplit(url)
+        if parts.scheme in ("http", "https") and parts.netloc:
+            origins.add(f"{parts.scheme}://{parts.netloc}/")
+    
+    client = get_http_client()
+    
+    async def head(origin: str):
+        try:
+            await client.head(origin, timeout=timeout)
+        except Exception:
+            pass
+    
+    await asyncio.gather(*(head(origin) for origin in origins))
+
+
+def shutdown(timeout: float = 5):
+    """Закрыть сетевые ресурсы при выходе из приложения.
+    
+    Закрывает HTTP-клиент и асинхронные генераторы общего цикла, затем
+    останавливает и закрывает сам цикл.
+    """
+    global _loop, _loop_thread
+    with _loop_lock:
+        loop, thread = _loop, _loop_thread
+        _loop = _loop_thread = None
+    if loop is None:
+        return
+    
+    async def close():
+        await close_http_client()
+        await loop.shutdown_asyncgens()
+    
+    try:
+        asyncio.run_coroutine_threadsafe(close(), loop).result(timeout)
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+
+
 class APIProvider(Enum):
     """Провайдеры API."""
     OPENAI = "openai"
@@ -61,90 +212,290 @@ class ImprovedPrompt:
     error: Optional[str] = None
 
 
+# Переменные окружения с API ключами провайдеров
+API_KEY_ENV_VARS = {
+    APIProvider.OPENAI: "OPENAI_API_KEY",
+    APIProvider.ANTHROPIC: "ANTHROPIC_API_KEY",
+    APIProvider.DEEPSEEK: "DEEPSEEK_API_KEY",
+    APIProvider.GROQ: "GROQ_API_KEY",
+    APIProvider.OPENROUTER: "OPENROUTER_API_KEY",
+}
+
+# Ключи читаются из окружения один раз (после load_dotenv), а не при каждом запросе
+_api_keys: dict[APIProvider, Optional[str]] = {}
+
+
+def refresh_api_keys():
+    """Перечитать API ключи из переменных окружения."""
+    global _api_keys
+    _api_keys = {
+        provider: os.getenv(env_var)
+        for provider, env_var in API_KEY_ENV_VARS.items()
+    }
+
+
+refresh_api_keys()
+
+
 def get_api_key(provider: APIProvider) -> Optional[str]:
     """Получить API ключ для провайдера."""
-    key_mapping = {
-        APIProvider.OPENAI: "OPENAI_API_KEY",
-        APIProvider.ANTHROPIC: "ANTHROPIC_API_KEY",
-        APIProvider.DEEPSEEK: "DEEPSEEK_API_KEY",
-        APIProvider.GROQ: "GROQ_API_KEY",
-        APIProvider.OPENROUTER: "OPENROUTER_API_KEY",
-    }
-    env_var = key_mapping.get(provider)
-    if env_var:
-        return os.getenv(env_var)
-    return None
+    return _api_keys.get(provider)
+
 
+# Провайдер по домену хоста API (совпадает и для поддоменов, например api.openai.com)
+_HOST_MAP = {
+    "openai.com": APIProvider.OPENAI,
+    "anthropic.com": APIProvider.ANTHROPIC,
+    "deepseek.com": APIProvider.DEEPSEEK,
+    "groq.com": APIProvider.GROQ,
+    "openrouter.ai": APIProvider.OPENROUTER,
+}
 
+
+@lru_cache(maxsize=128)
 def detect_provider(api_url: str) -> APIProvider:
-    """Определить провайдера по URL."""
-    url_lower = api_url.lower()
-    if "openai.com" in url_lower:
-        return APIProvider.OPENAI
-    elif "anthropic.com" in url_lower:
-        return APIProvider.ANTHROPIC
-    elif "deepseek.com" in url_lower:
-        return APIProvider.DEEPSEEK
-    elif "groq.com" in url_lower:
-        return APIProvider.GROQ
-    elif "openrouter.ai" in url_lower:
-        return APIProvider.OPENROUTER
+    """Определить провайдера по хосту URL."""
+    host = urlsplit(api_url).hostname or ""
+    for domain, provider in _HOST_MAP.items():
+        if host == domain or host.endswith("." + domain):
+            return provider
     return APIProvider.CUSTOM
 
 
+def _anthropic_delta(data: dict) -> str:
+    """Текст фрагмента потокового ответа Anthropic."""
+    return data.get("delta", {}).get("text", "")
+
+
+def _openai_delta(data: dict) -> str:
+    """Текст фрагмента потокового ответа в OpenAI-совместимом формате."""
+    return (data.get("choices") or [{}])[0].get("delta", {}).get("content", "")
+
+
+# Размер куска при чтении потокового ответа
+SSE_READ_SIZE = 8192
+
+
+async def _iter_sse_data(response: httpx.Response) -> AsyncGenerator[bytes, None]:
+    """Выдавать содержимое строк "data:" потока SSE в виде bytes.
+    
+    Поток разбирается по байтам: остальные строки (event:, комментарии,
+    пустые разделители) не декодируются в str.
+    """
+    buffer = bytearray()
+    async for chunk in response.aiter_bytes(SSE_READ_SIZE):
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", start)) != -1:
+            if buffer.startswith(b"data:", start):
+                yield bytes(buffer[start + 5:end]).strip()
+            start = end + 1
+        del buffer[:start]
+    if buffer.startswith(b"data:"):
+        yield bytes(buffer[5:]).strip()
+
+
+# Сколько успешных ответов хранится в кэше клиента
+RESPONSE_CACHE_MAX_ENTRIES = 256
+
+
+# Размер контекста провайдера в токенах. Для OpenRouter и своих API
+# модели слишком разные, для них длина промпта не проверяется
+CONTEXT_LIMITS = {
+    APIProvider.OPENAI: 128000,
+    APIProvider.ANTHROPIC: 200000,
+    APIProvider.DEEPSEEK: 128000,
+    APIProvider.GROQ: 128000,
+}
+
+# Грубая оценка ~4 символа на токен; для кириллицы она занижена,
+# поэтому проверка не отсекает промпты, которые на деле помещаются
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Приблизительно оценить число токенов в тексте."""
+    return len(text) // CHARS_PER_TOKEN
+
+
+def check_context_limit(
+    provider: APIProvider,
+    prompt: str,
+    max_tokens: int,
+    system: Optional[str] = None
+) -> Optional[APIResponse]:
+    """Вернуть ответ с ошибкой, если промпт заведомо не помещается в контекст."""
+    limit = CONTEXT_LIMITS.get(provider)
+    if limit is None:
+        return None
+    
+    approx_tokens = estimate_tokens(prompt) + (estimate_tokens(system) if system else 0)
+    if approx_tokens + max_tokens <= limit:
+        return None
+    return APIResponse(
+        success=False,
+        content="",
+        error=(
+            f"Промпт слишком длинный: ~{approx_tokens} токенов + {max_tokens} на ответ "
+            f"превышают контекст {provider.value} ({limit})"
+        )
+    )
+
+
+# Сколько байт тела ответа с ошибкой читается для сообщения
+# (хватает на 200 символов в UTF-8)
+ERROR_PREVIEW_BYTES = 1024
+
+
+async def _read_error_text(response: httpx.Response) -> str:
+    """Прочитать начало тела ответа с ошибкой; остаток не загружается."""
+    preview = bytearray()
+    async for chunk in response.aiter_bytes():
+        preview += chunk
+        if len(preview) >= ERROR_PREVIEW_BYTES:
+            break
+    return preview[:ERROR_PREVIEW_BYTES].decode("utf-8", "replace")
+
+
 class LLMClient:
     """Клиент для работы с LLM API."""
     
-    def __init__(self, timeout: int = 30):
+    def __init__(self, timeout: int = 30, cache_enabled: bool = True):
         self.timeout = timeout
+        # Повторный идентичный запрос к модели отдаётся из кэша без сети
+        self.cache_enabled = cache_enabled
+        self._response_cache: OrderedDict[str, APIResponse] = OrderedDict()
         self._custom_api_key: Optional[str] = None
+        # Готовые заголовки по (провайдер, ключ); не изменять на месте
+        self._headers_cache: dict[tuple[APIProvider, str], httpx.Headers] = {}
+        # Сериализованные тела запросов с меткой вместо промпта
+        self._body_template_cache: dict[tuple[APIProvider, str, int, bool], bytes] = {}
+        # Последний закодированный промпт: при рассылке в несколько моделей
+        # один и тот же объект строки кодируется в JSON один раз
+        self._encoded_prompt: Optional[tuple[str, bytes]] = None
     
     def set_custom_api_key(self, api_key: str):
         """Установить кастомный API ключ."""
         self._custom_api_key = api_key
+        self._headers_cache.clear()
     
-    def _get_headers(self, provider: APIProvider) -> dict:
+    def _get_headers(self, provider: APIProvider) -> httpx.Headers:
         """Получить заголовки для запроса."""
-        api_key = self._custom_api_key or get_api_key(provider)
+        api_key = self._custom_api_key or get_api_key(provider) or ""
+        key = (provider, api_key)
+        headers = self._headers_cache.get(key)
+        if headers is None:
+            headers = self._headers_cache[key] = self._make_headers(provider, api_key)
+        return headers
+    
+    @staticmethod
+    def _make_headers(provider: APIProvider, api_key: str) -> httpx.Headers:
+        """Сформировать заголовки для провайдера.
         
+        httpx.Headers хранит уже закодированные байты, поэтому при каждом
+        запросе значения не кодируются заново.
+        """
         if provider == APIProvider.ANTHROPIC:
-            return {
+            return httpx.Headers({
                 "Content-Type": "application/json",
-                "x-api-key": api_key or "",
+                "x-api-key": api_key,
                 "anthropic-version": "2023-06-01"
-            }
+            })
         else:
             # OpenAI-совместимый формат (OpenAI, DeepSeek, Groq и др.)
-            return {
+            return httpx.Headers({
                 "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key or ''}"
-            }
+                "Authorization": f"Bearer {api_key}"
+            })
     
     def _build_request_body(
         self, 
         provider: APIProvider, 
         model_id: str, 
         prompt: str,
-        max_tokens: int = 4096
+        max_tokens: int = 4096,
+        system: Optional[str] = None,
+        cache_key: Optional[str] = None
     ) -> dict:
-        """Сформировать тело запроса."""
+        """Сформировать тело запроса.
+        
+        system - общий префикс промпта (инструкция), который провайдер может
+        закэшировать; cache_key - ключ кэша промптов OpenAI. Без них тело
+        запроса имеет прежний вид.
+        """
         if provider == APIProvider.ANTHROPIC:
+            if system is None:
+                content = prompt
+            else:
+                # Точка кэширования: префикс переиспользуется между запросами
+                content = [
+                    {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}},
+                    {"type": "text", "text": prompt}
+                ]
             return {
                 "model": model_id,
                 "max_tokens": max_tokens,
                 "messages": [
-                    {"role": "user", "content": prompt}
+                    {"role": "user", "content": content}
                 ]
             }
         else:
             # OpenAI-совместимый формат
-            return {
+            content = prompt if system is None else f"{system}\n\n{prompt}"
+            body = {
                 "model": model_id,
                 "messages": [
-                    {"role": "user", "content": prompt}
+                    {"role": "user", "content": content}
                 ],
                 "max_tokens": max_tokens
             }
+            # prompt_cache_key поддерживает только OpenAI
+            if provider == APIProvider.OPENAI and (system is not None or cache_key):
+                body["prompt_cache_key"] = cache_key or hashlib.blake2b(
+                    system.encode("utf-8"), digest_size=16
+                ).hexdigest()
+            return body
+    
+    def _encode_request_body(
+        self,
+        provider: APIProvider,
+        model_id: str,
+        prompt: str,
+        max_tokens: int = 4096,
+        stream: bool = False,
+        system: Optional[str] = None,
+        cache_key: Optional[str] = None
+    ) -> bytes:
+        """Получить тело запроса в виде JSON-байтов.
+        
+        Обвязка запроса для модели сериализуется один раз, при каждой
+        отправке в неё подставляется только закодированный промпт.
+        """
+        if system is not None or cache_key:
+            body = self._build_request_body(
+                provider, model_id, prompt, max_tokens, system, cache_key
+            )
+            if stream:
+                body["stream"] = True
+            return json_dumps(body)
+        
+        key = (provider, model_id, max_tokens, stream)
+        template = self._body_template_cache.get(key)
+        if template is None:
+            body = self._build_request_body(provider, model_id, _PROMPT_SENTINEL, max_tokens)
+            if stream:
+                body["stream"] = True
+            template = self._body_template_cache[key] = json_dumps(body)
+        return template.replace(_PROMPT_SENTINEL_JSON, self._encode_prompt(prompt))
+    
+    def _encode_prompt(self, prompt: str) -> bytes:
+        """Закодировать промпт в JSON-строку (с кавычками)."""
+        cached = self._encoded_prompt
+        if cached is not None and cached[0] is prompt:
+            return cached[1]
+        encoded = json_dumps(prompt)
+        self._encoded_prompt = (prompt, encoded)
+        return encoded
     
     def _parse_response(self, provider: APIProvider, data: dict) -> APIResponse:
         """Распарсить ответ от API."""
@@ -169,16 +520,71 @@ class LLMClient:
                 error=f"Ошибка парсинга ответа: {e}"
             )
     
+    @staticmethod
+    def _response_cache_key(
+        model: Model,
+        prompt: str,
+        max_tokens: int,
+        system: Optional[str] = None
+    ) -> str:
+        """Ключ кэша ответов для запроса."""
+        raw = f"{model.api_url}|{model.api_id}|{max_tokens}|{system or ''}|{prompt}".encode("utf-8")
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
+    
     async def send_prompt(
         self, 
         model: Model, 
         prompt: str,
-        max_tokens: int = 4096
+        max_tokens: int = 4096,
+        system: Optional[str] = None,
+        cache_key: Optional[str] = None
     ) -> APIResponse:
-        """Отправить промпт в модель и получить ответ."""
+        """Отправить промпт в модель и получить ответ.
+        
+        Успешные ответы кэшируются (если включён cache_enabled): повтор
+        того же промпта к той же модели возвращается без запроса к API.
+        system и cache_key передаются провайдеру как подсказки кэша промптов
+        (см. _build_request_body).
+        """
+        if not self.cache_enabled:
+            return await self._send_prompt_uncached(
+                model, prompt, max_tokens, system, cache_key
+            )
+        
+        key = self._response_cache_key(model, prompt, max_tokens, system)
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            self._response_cache.move_to_end(key)
+            return cached
+        
+        response = await self._send_prompt_uncached(
+            model, prompt, max_tokens, system, cache_key
+        )
+        if response.success:
+            self._response_cache[key] = response
+            if len(self._response_cache) > RESPONSE_CACHE_MAX_ENTRIES:
+                self._response_cache.popitem(last=False)
+        return response
+    
+    async def _send_prompt_uncached(
+        self,
+        model: Model,
+        prompt: str,
+        max_tokens: int,
+        system: Optional[str] = None,
+        cache_key: Optional[str] = None
+    ) -> APIResponse:
+        """Выполнить запрос к API без обращения к кэшу ответов."""
         provider = detect_provider(model.api_url)
+        too_long = check_context_limit(provider, prompt, max_tokens, system)
+        if too_long is not None:
+            return too_long
+        
         headers = self._get_headers(provider)
-        body = self._build_request_body(provider, model.api_id, prompt, max_tokens)
+        body = self._encode_request_body(
+            provider, model.api_id, prompt, max_tokens,
+            system=system, cache_key=cache_key
+        )
         
         # Проверка наличия API ключа
         if not self._custom_api_key and not get_api_key(provider):
@@ -189,23 +595,26 @@ class LLMClient:
             )
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    model.api_url,
-                    headers=headers,
-                    json=body
+            # Тело кодируется заранее: заголовок Content-Type уже задан.
+            # Ответ читается потоком, чтобы у ошибки брать только начало тела
+            async with get_http_client().stream(
+                "POST",
+                model.api_url,
+                headers=headers,
+                content=body,
+                timeout=self.timeout
+            ) as response:
+                if response.status_code == 200:
+                    data = json_loads(await response.aread())
+                    return self._parse_response(provider, data)
+                
+                error_text = await _read_error_text(response)
+                return APIResponse(
+                    success=False,
+                    content="",
+                    error=f"HTTP {response.status_code}: {error_text[:200]}"
                 )
                 
-                if response.status_code == 200:
-                    return self._parse_response(provider, response.json())
-                else:
-                    error_text = response.text
-                    return APIResponse(
-                        success=False,
-                        content="",
-                        error=f"HTTP {response.status_code}: {error_text[:200]}"
-                    )
-                    
         except httpx.TimeoutException:
             return APIResponse(
                 success=False,
@@ -230,13 +639,26 @@ class LLMClient:
         model: Model,
         prompt: str,
         on_chunk: Callable[[str], None],
-        max_tokens: int = 4096
+        max_tokens: int = 4096,
+        flush_every_ms: float = 16.0,
+        flush_every_chars: int = 64
     ) -> APIResponse:
-        """Отправить промпт с потоковой передачей ответа."""
+        """Отправить промпт с потоковой передачей ответа.
+        
+        Кэш ответов здесь не используется: фрагменты передаются в on_chunk.
+        Мелкие фрагменты объединяются: on_chunk вызывается, когда накопилось
+        flush_every_chars символов или прошло flush_every_ms с прошлого вызова,
+        и один раз в конце для остатка.
+        """
         provider = detect_provider(model.api_url)
+        too_long = check_context_limit(provider, prompt, max_tokens)
+        if too_long is not None:
+            return too_long
+        
         headers = self._get_headers(provider)
-        body = self._build_request_body(provider, model.api_id, prompt, max_tokens)
-        body["stream"] = True
+        body = self._encode_request_body(
+            provider, model.api_id, prompt, max_tokens, stream=True
+        )
         
         if not self._custom_api_key and not get_api_key(provider):
             return APIResponse(
@@ -245,79 +667,135 @@ class LLMClient:
                 error=f"API ключ не найден для провайдера {provider.value}"
             )
         
-        full_content = ""
+        # Фрагменты ответа; строка собирается один раз в конце
+        chunks: list[str] = []
+        # Сколько фрагментов уже передано в on_chunk и сколько символов ждут
+        flushed = 0
+        pending_chars = 0
+        loop = asyncio.get_running_loop()
+        last_flush = loop.time()
+        
+        def flush():
+            nonlocal flushed, pending_chars, last_flush
+            if flushed < len(chunks):
+                on_chunk("".join(chunks[flushed:]))
+                flushed = len(chunks)
+            pending_chars = 0
+            last_flush = loop.time()
         
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                async with client.stream(
-                    "POST",
-                    model.api_url,
-                    headers=headers,
-                    json=body
-                ) as response:
-                    if response.status_code != 200:
-                        error_text = await response.aread()
-                        return APIResponse(
-                            success=False,
-                            content="",
-                            error=f"HTTP {response.status_code}: {error_text.decode()[:200]}"
-                        )
+            async with get_http_client().stream(
+                "POST",
+                model.api_url,
+                headers=headers,
+                content=body,
+                timeout=self.timeout
+            ) as response:
+                if response.status_code != 200:
+                    error_text = await _read_error_text(response)
+                    return APIResponse(
+                        success=False,
+                        content="",
+                        error=f"HTTP {response.status_code}: {error_text[:200]}"
+                    )
+                
+                extract_delta = (
+                    _anthropic_delta if provider is APIProvider.ANTHROPIC else _openai_delta
+                )
+                async for payload in _iter_sse_data(response):
+                    if payload == b"[DONE]":
+                        break
+                    # Служебные и битые кадры пропускаются
+                    try:
+                        delta = extract_delta(json_loads(payload))
+                    except (KeyError, IndexError, ValueError, AttributeError):
+                        continue
                     
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data_str = line[6:]
-                            if data_str == "[DONE]":
-                                break
-                            try:
-                                import json
-                                data = json.loads(data_str)
-                                
-                                if provider == APIProvider.ANTHROPIC:
-                                    delta = data.get("delta", {}).get("text", "")
-                                else:
-                                    delta = data.get("choices", [{}])[0].get("delta", {}).get("content", "")
-                                
-                                if delta:
-                                    full_content += delta
-                                    on_chunk(delta)
-                            except:
-                                pass
+                    if delta:
+                        chunks.append(delta)
+                        pending_chars += len(delta)
+                        if (pending_chars >= flush_every_chars
+                                or (loop.time() - last_flush) * 1000 >= flush_every_ms):
+                            flush()
             
             return APIResponse(
                 success=True,
-                content=full_content
+                content="".join(chunks)
             )
             
         except httpx.TimeoutException:
             return APIResponse(
                 success=False,
-                content=full_content,
+                content="".join(chunks),
                 error="Превышено время ожидания ответа"
             )
         except Exception as e:
             return APIResponse(
                 success=False,
-                content=full_content,
+                content="".join(chunks),
                 error=f"Ошибка: {e}"
             )
+        finally:
+            flush()
 
 
-async def send_to_multiple_models(
+@lru_cache(maxsize=8)
+def get_llm_client(timeout: int = 30, cache_enabled: bool = True) -> LLMClient:
+    """Получить общий клиент для заданного таймаута и режима кэша ответов.
+    
+    Клиент живёт между отправками, поэтому его кэши (заголовки, шаблоны
+    тел запросов, ответы) переиспользуются.
+    """
+    return LLMClient(timeout=timeout, cache_enabled=cache_enabled)
+
+
+# Ограничение одновременных запросов по умолчанию
+DEFAULT_MAX_CONCURRENT_REQUESTS = 16
+
+
+async def send_to_models_as_completed(
     models: list[Model],
     prompt: str,
-    timeout: int = 30
-) -> dict[int, APIResponse]:
-    """Отправить промпт во все указанные модели параллельно."""
-    client = LLMClient(timeout=timeout)
+    timeout: int = 30,
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+    cache_enabled: bool = True
+) -> AsyncGenerator[tuple[int, APIResponse], None]:
+    """Отправить промпт во все модели параллельно, выдавая ответы по мере готовности.
+    
+    Одновременно выполняется не больше max_concurrent запросов. Если
+    получатель прекращает чтение (или отправку отменяют), незавершённые
+    запросы отменяются, а не продолжают работать в цикле.
+    При cache_enabled=False каждый запрос уходит в API, минуя кэш ответов.
+    """
+    client = get_llm_client(timeout, cache_enabled)
+    semaphore = asyncio.Semaphore(max_concurrent)
     
     async def send_one(model: Model) -> tuple[int, APIResponse]:
-        response = await client.send_prompt(model, prompt)
+        async with semaphore:
+            response = await client.send_prompt(model, prompt)
         return model.id, response
     
-    tasks = [send_one(model) for model in models]
-    results = await asyncio.gather(*tasks)
-    
-    return {model_id: response for model_id, response in results}
+    tasks = [asyncio.create_task(send_one(model)) for model in models]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def send_to_multiple_models(
+    models: list[Model],
+    prompt: str,
+    timeout: int = 30,
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+    cache_enabled: bool = True
+) -> dict[int, APIResponse]:
+    """Отправить промпт во все указанные модели параллельно."""
+    stream = send_to_models_as_completed(
+        models, prompt, timeout, max_concurrent, cache_enabled
+    )
+    return {model_id: response async for model_id, response in stream}
 
 
 # Системный промпт для AI-ассистента улучшения промптов
@@ -386,12 +864,16 @@ async def improve_prompt(
     timeout: int = 60
 ) -> ImprovedPrompt:
     """Отправить промпт на улучшение в указанную модель."""
-    client = LLMClient(timeout=timeout)
+    # Повторное «Улучшить» должно давать новые варианты, а не те же из кэша
+    client = get_llm_client(timeout, False)
     
-    # Формируем запрос для улучшения промта
-    full_prompt = f"{IMPROVE_PROMPT_SYSTEM}\n\nПромпт пользователя для улучшения:\n\"\"\"\n{original_prompt}\n\"\"\""
+    # Формируем запрос для улучшения промта; инструкция неизменна,
+    # поэтому провайдер может закэшировать этот префикс
+    user_prompt = f"Промпт пользователя для улучшения:\n\"\"\"\n{original_prompt}\n\"\"\""
     
-    response = await client.send_prompt(model, full_prompt, max_tokens=2000)
+    response = await client.send_prompt(
+        model, user_prompt, max_tokens=2000, system=IMPROVE_PROMPT_SYSTEM
+    )
     
     if not response.success:
         return ImprovedPrompt(
@@ -3,8 +3,10 @@
 Поддерживает пагинацию и CRUD операции.
 """
 
+import re
 import sys
 import sqlite3
+from collections import OrderedDict
 from PyQt6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -16,8 +18,7 @@ from PyQt6.QtWidgets import (
     QListWidget,
     QFileDialog,
     QMessageBox,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QHeaderView,
     QSpinBox,
     QDialog,
@@ -27,7 +28,16 @@ from PyQt6.QtWidgets import (
     QSplitter,
     QFrame,
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import (
+    Qt,
+    QAbstractTableModel,
+    QModelIndex,
+    QObject,
+    QTimer,
+    QThread,
+    pyqtSignal,
+    pyqtSlot,
+)
 
 
 DARK_STYLE = """
@@ -64,7 +74,7 @@ QListWidget::item:hover {
     background-color: #45475a;
 }
 
-QTableWidget {
+QTableView {
     background-color: #313244;
     border: 1px solid #45475a;
     border-radius: 6px;
@@ -73,11 +83,11 @@ QTableWidget {
     font-size: 13px;
 }
 
-QTableWidget::item {
+QTableView::item {
     padding: 5px;
 }
 
-QTableWidget::item:selected {
+QTableView::item:selected {
     background-color: #89b4fa;
     color: #1e1e2e;
 }
@@ -173,6 +183,214 @@ QSplitter::handle {
 """
 
 
+# Настройки соединения просмотрщика (действуют только на это соединение)
+CONNECTION_PRAGMAS = (
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "cache_size=-65536",
+)
+# Отображение файла в память для чтения, байт
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Строк в одной пачке при потоковом чтении страницы
+FETCH_BATCH_SIZE = 25
+# Сколько заранее прочитанных страниц хранить
+PAGE_CACHE_SIZE = 4
+# Не больше стольких ключей в одном DELETE ... IN (...):
+# старые SQLite ограничивают число параметров запроса 999
+DELETE_CHUNK_SIZE = 900
+# Пауза после изменения размера страницы перед загрузкой, мс
+PAGE_SIZE_DEBOUNCE_MS = 250
+
+
+class ParamRows(list):
+    """Набор кортежей параметров: запрос с ним выполняется через executemany."""
+
+
+# Имена, под которыми SQLite отдаёт rowid (если их не заняли колонки таблицы)
+ROWID_ALIASES = ("rowid", "_rowid_", "oid")
+
+
+def is_without_rowid(create_sql):
+    """Объявлена ли таблица как WITHOUT ROWID (по её CREATE TABLE)."""
+    if not create_sql:
+        return False
+    # Опции таблицы стоят после последней закрывающей скобки
+    options = create_sql[create_sql.rfind(")") + 1:]
+    return re.search(r"\bwithout\s+rowid\b", options, re.IGNORECASE) is not None
+
+
+def quote_identifier(name):
+    """Экранировать имя таблицы или колонки для подстановки в SQL."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+class DbWorker(QObject):
+    """Выполняет запросы к SQLite в отдельном потоке, чтобы не блокировать окно.
+    
+    Соединение открывается в потоке воркера при первом запросе и живёт до
+    close(). Запросы одного вызова run_queries выполняются в одной транзакции.
+    """
+    
+    # (тег, результаты fetchall() по каждому запросу, контекст запроса)
+    result_ready = pyqtSignal(str, object, object)
+    # (тег, очередная пачка строк последнего запроса, контекст) - для stream_queries
+    rows_fetched = pyqtSignal(str, object, object)
+    # (тег, текст ошибки, контекст запроса)
+    failed = pyqtSignal(str, str, object)
+    
+    def __init__(self, db_path):
+        super().__init__()
+        self.db_path = db_path
+        self.conn = None
+    
+    def _connect(self):
+        # Запросы таблицы готовятся один раз и берутся из кэша соединения
+        self.conn = sqlite3.connect(self.db_path, cached_statements=256)
+        # Значения берутся по имени колонки, а не по позиции в SELECT *
+        self.conn.row_factory = sqlite3.Row
+        # Только настройки соединения: режим журнала в самом файле не меняется
+        for pragma in CONNECTION_PRAGMAS:
+            self.conn.execute(f"PRAGMA {pragma}")
+        try:
+            self.conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        except sqlite3.Error:
+            # Сборка SQLite без mmap - читаем как обычно
+            pass
+    
+    @pyqtSlot(str, object, object)
+    def run_queries(self, tag, queries, context):
+        """Выполнить список (sql, params) и вернуть результаты сигналом.
+        
+        Если params - ParamRows, запрос выполняется через executemany.
+        Все запросы списка идут одной транзакцией (один COMMIT).
+        """
+        self._execute(tag, queries, context, stream=False)
+    
+    @pyqtSlot(str, object, object)
+    def stream_queries(self, tag, queries, context):
+        """Как run_queries, но строки последнего запроса ещё и отдаются
+        пачками через rows_fetched по мере чтения."""
+        self._execute(tag, queries, context, stream=True)
+    
+    def _execute(self, tag, queries, context, stream):
+        try:
+            if self.conn is None:
+                self._connect()
+            results = []
+            # Транзакция: фиксируется при успехе, откатывается при ошибке
+            with self.conn:
+                for i, (sql, params) in enumerate(queries):
+                    if isinstance(params, ParamRows):
+                        self.conn.executemany(sql, params)
+                        results.append([])
+                    elif stream and i == len(queries) - 1:
+                        results.append(self._fetch_batches(tag, sql, params, context))
+                    else:
+                        results.append(self.conn.execute(sql, params).fetchall())
+        except sqlite3.Error as e:
+            self.failed.emit(tag, str(e), context)
+            return
+        self.result_ready.emit(tag, results, context)
+    
+    def _fetch_batches(self, tag, sql, params, context):
+        cursor = self.conn.execute(sql, params)
+        rows = []
+        while True:
+            batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not batch:
+                return rows
+            rows.extend(batch)
+            self.rows_fetched.emit(tag, batch, context)
+    
+    @pyqtSlot()
+    def close(self):
+        """Закрыть соединение и завершить поток (после уже поставленных запросов)."""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        self.thread().quit()
+
+
+def display_row(row, columns):
+    """Текст ячеек строки в порядке columns (NULL - пустая строка)."""
+    return ["" if v is None else v if isinstance(v, str) else str(v)
+            for v in (row[col] for col in columns)]
+
+
+class SqlitePageModel(QAbstractTableModel):
+    """Модель одной страницы таблицы: строки хранятся как sqlite3.Row.
+    
+    Текст ячеек считается один раз при получении строк, а не при каждой
+    перерисовке, и не требует объекта Qt на ячейку.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._display = []
+        self._columns = []
+    
+    def set_page(self, columns, rows):
+        """Заменить содержимое модели новой страницей."""
+        self.beginResetModel()
+        self._columns = list(columns)
+        self._rows = rows
+        self._display = [display_row(row, self._columns) for row in rows]
+        self.endResetModel()
+    
+    def row_values(self, row):
+        """Исходная строка (sqlite3.Row, доступ по имени колонки)."""
+        return self._rows[row]
+    
+    def append_rows(self, rows):
+        """Дописать строки в конец страницы."""
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self._display.extend(display_row(row, self._columns) for row in rows)
+        self.endInsertRows()
+    
+    def update_row(self, row, values):
+        """Заменить значения одной строки."""
+        self._rows[row] = values
+        self._display[row] = display_row(values, self._columns)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self._columns) - 1))
+    
+    def remove_row(self, row):
+        """Убрать строку со страницы."""
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        del self._display[row]
+        self.endRemoveRows()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+    
+    def flags(self, index):
+        # Только просмотр: правка идёт через диалог записи
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        return self._display[index.row()][index.column()]
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._columns[section] if section < len(self._columns) else None
+        return str(section + 1)
+
+
 class RecordDialog(QDialog):
     """Диалог для создания/редактирования записи."""
     
@@ -220,14 +438,71 @@ class RecordDialog(QDialog):
 class DatabaseViewerWindow(QMainWindow):
     """Главное окно для просмотра базы данных SQLite."""
     
+    # Запросы к воркеру БД: (тег, [(sql, params), ...], контекст);
+    # контекст - (таблица, строки на странице / номер запроса страницы / None)
+    query_requested = pyqtSignal(str, object, object)
+    # То же для страницы: строки приходят пачками
+    stream_requested = pyqtSignal(str, object, object)
+    close_requested = pyqtSignal()
+    
+    # Сообщения по тегу запроса
+    QUERY_ERRORS = {
+        "tables": "Не удалось открыть базу данных",
+        "columns": "Ошибка загрузки колонок",
+        "page": "Ошибка загрузки данных",
+        "create": "Ошибка создания записи",
+        "update": "Ошибка обновления записи",
+        "delete": "Ошибка удаления записи",
+        "prefetch": "Ошибка загрузки данных",
+    }
+    QUERY_SUCCESS = {
+        "create": "Запись успешно создана!",
+        "update": "Запись успешно обновлена!",
+        "delete": "Запись успешно удалена!",
+    }
+    
     def __init__(self):
         super().__init__()
         self.db_path = None
+        # Поток с единственным соединением к открытому файлу
+        self._db_thread = None
+        self._db_worker = None
+        # Идёт загрузка страницы: кнопки пагинации заблокированы
+        self._loading = False
         self.current_table = None
         self.columns = []
+        # Колонки, по которым UPDATE/DELETE находят запись (первичный ключ
+        # или скрытый rowid), и однозначно ли они её определяют
+        self._key_cols = []
+        self._key_unique = False
+        # Скрытая колонка rowid в выборке (если ключ - rowid)
+        self._rowid_col = None
+        # Ключ постраничного чтения (если он из одной колонки) и значение,
+        # после которого начинается каждая просмотренная страница
+        self._seek_col = None
+        self._page_cursors = [None]
+        # Номер последнего запроса страницы (ответы на прежние отбрасываются)
+        # и сколько его строк уже показано
+        self._page_request = 0
+        self._page_shown = 0
+        # Заранее прочитанные страницы: номер -> строки (с лишней строкой).
+        # Поколение растёт при каждом сбросе, опоздавшие ответы отбрасываются
+        self._page_cache = OrderedDict()
+        self._page_cache_gen = 0
         self.page = 0
         self.page_size = 20
         self.total_rows = 0
+        # Есть ли строки после текущей страницы (страница читается с одной лишней строкой)
+        self._has_next = False
+        # COUNT(*) по таблицам: считается один раз, сбрасывается при
+        # добавлении/удалении записей и по кнопке «Обновить»
+        self._row_counts = {}
+        # Имена таблиц из sqlite_master: открыть можно только их
+        self._table_names = set()
+        # Схема по файлам БД: список таблиц и PRAGMA table_info по таблицам.
+        # Сбрасывается только кнопкой «Обновить схему»
+        self._tables_cache = {}
+        self._columns_cache = {}
         self.init_ui()
     
     def init_ui(self):
@@ -287,6 +562,11 @@ class DatabaseViewerWindow(QMainWindow):
         self.open_table_btn.setEnabled(False)
         left_layout.addWidget(self.open_table_btn)
         
+        self.refresh_schema_btn = QPushButton("🔄 Обновить схему")
+        self.refresh_schema_btn.clicked.connect(self.refresh_schema)
+        self.refresh_schema_btn.setEnabled(False)
+        left_layout.addWidget(self.refresh_schema_btn)
+        
         self.tables_list.itemSelectionChanged.connect(self.on_table_selection_changed)
         
         splitter.addWidget(left_panel)
@@ -331,11 +611,16 @@ class DatabaseViewerWindow(QMainWindow):
         right_layout.addLayout(crud_layout)
         
         # Таблица данных
-        self.data_table = QTableWidget()
-        self.data_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.data_table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.model = SqlitePageModel(self)
+        self.data_table = QTableView()
+        self.data_table.setModel(self.model)
+        self.data_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.data_table.setSelectionMode(QTableView.SelectionMode.ExtendedSelection)
         self.data_table.horizontalHeader().setStretchLastSection(True)
-        self.data_table.itemSelectionChanged.connect(self.on_row_selection_changed)
+        # Фиксированная высота строк: при вставке пачек строк высоты не пересчитываются
+        self.data_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.data_table.setSortingEnabled(False)
+        self.data_table.selectionModel().selectionChanged.connect(self.on_row_selection_changed)
         right_layout.addWidget(self.data_table)
         
         # Пагинация
@@ -362,6 +647,11 @@ class DatabaseViewerWindow(QMainWindow):
         self.page_size_spin.setRange(5, 100)
         self.page_size_spin.setValue(20)
         self.page_size_spin.valueChanged.connect(self.on_page_size_changed)
+        # Серия щелчков по стрелкам даёт один запрос - после паузы
+        self._page_size_timer = QTimer(self)
+        self._page_size_timer.setSingleShot(True)
+        self._page_size_timer.setInterval(PAGE_SIZE_DEBOUNCE_MS)
+        self._page_size_timer.timeout.connect(self.apply_page_size)
         pagination_layout.addWidget(self.page_size_spin)
         
         pagination_layout.addStretch()
@@ -389,40 +679,140 @@ class DatabaseViewerWindow(QMainWindow):
         if not file_path:
             return
         
+        self.start_worker(file_path)
+        
         self.db_path = file_path
         self.file_label.setText(file_path)
         self.file_label.setStyleSheet("color: #a6e3a1;")
         
+        self.refresh_schema_btn.setEnabled(True)
+        
         self.load_tables()
         self.clear_data_view()
     
+    def start_worker(self, db_path):
+        """Запустить поток БД для файла (предыдущий поток завершается)."""
+        self.stop_worker()
+        self._row_counts.clear()
+        self._table_names.clear()
+        self.clear_page_cache()
+        
+        self._db_thread = QThread(self)
+        self._db_worker = DbWorker(db_path)
+        self._db_worker.moveToThread(self._db_thread)
+        self.query_requested.connect(self._db_worker.run_queries)
+        self.stream_requested.connect(self._db_worker.stream_queries)
+        self.close_requested.connect(self._db_worker.close)
+        self._db_worker.result_ready.connect(self.on_query_result)
+        self._db_worker.rows_fetched.connect(self.on_rows_fetched)
+        self._db_worker.failed.connect(self.on_query_failed)
+        self._db_thread.start()
+    
+    def stop_worker(self):
+        """Дождаться уже отправленных запросов и закрыть соединение."""
+        if self._db_thread is None:
+            return
+        
+        self.close_requested.emit()
+        self._db_thread.wait()
+        self.query_requested.disconnect(self._db_worker.run_queries)
+        self.stream_requested.disconnect(self._db_worker.stream_queries)
+        self.close_requested.disconnect(self._db_worker.close)
+        self._db_thread = None
+        self._db_worker = None
+        self._loading = False
+    
+    def run_queries(self, tag, queries, context=None):
+        """Отправить запросы в поток БД; ответ придёт в on_query_result."""
+        if self._db_worker is None:
+            return
+        if tag == "page":
+            self._set_loading(True)
+            # Страница приходит пачками в on_rows_fetched, итог - в on_query_result
+            self.stream_requested.emit(tag, queries, context)
+        else:
+            self.query_requested.emit(tag, queries, context)
+    
+    def _set_loading(self, loading):
+        """Заблокировать пагинацию на время загрузки страницы."""
+        self._loading = loading
+        if loading:
+            self.prev_btn.setEnabled(False)
+            self.next_btn.setEnabled(False)
+        else:
+            self.prev_btn.setEnabled(self.page > 0)
+            self.next_btn.setEnabled(self._has_next)
+    
+    def on_query_result(self, tag, results, context):
+        """Обработать результат запроса из потока БД."""
+        if tag == "tables":
+            self._tables_cache[self.db_path] = [table[0] for table in results[0]]
+            self.show_tables(self._tables_cache[self.db_path])
+            return
+        
+        table, row = context
+        if table != self.current_table:
+            # Ответ для таблицы, которую уже закрыли
+            return
+        
+        if tag == "columns":
+            schema = (results[0], is_without_rowid(results[1][0][0] if results[1] else None))
+            self._columns_cache.setdefault(self.db_path, {})[table] = schema
+            self.apply_columns(*schema)
+        elif tag == "page":
+            if row != self._page_request:
+                return
+            if len(results) > 1:
+                self._row_counts[table] = results[0][0][0]
+            self.show_page(results[-1])
+        elif tag == "prefetch":
+            page, gen = row
+            if gen == self._page_cache_gen:
+                self._page_cache[page] = results[0]
+                while len(self._page_cache) > PAGE_CACHE_SIZE:
+                    self._page_cache.popitem(last=False)
+        else:
+            # Данные изменились - заранее прочитанные страницы устарели
+            self.clear_page_cache()
+            QMessageBox.information(self, "Успех", self.QUERY_SUCCESS[tag])
+            if tag == "create":
+                self.apply_created_row()
+            elif tag == "update":
+                self.apply_updated_row(row, results[-1])
+            else:
+                self.apply_deleted_rows(row)
+    
+    def on_query_failed(self, tag, message, context):
+        """Показать ошибку запроса из потока БД."""
+        if tag == "prefetch":
+            # Упреждающее чтение необязательно: страница просто загрузится по кнопке
+            return
+        if tag == "page" and context == (self.current_table, self._page_request):
+            self._set_loading(False)
+        QMessageBox.critical(self, "Ошибка", f"{self.QUERY_ERRORS[tag]}:\n{message}")
+    
     def load_tables(self):
         """Загрузить список таблиц из базы данных."""
         self.tables_list.clear()
-        
-        if not self.db_path:
+        if self.db_path in self._tables_cache:
+            self.show_tables(self._tables_cache[self.db_path])
             return
-        
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(
-                "SELECT name FROM sqlite_master WHERE type='table' ORDER BY name"
-            )
-            tables = cursor.fetchall()
-            
-            for table in tables:
-                self.tables_list.addItem(table[0])
-            
-            conn.close()
-            
-        except sqlite3.Error as e:
-            QMessageBox.critical(
-                self,
-                "Ошибка",
-                f"Не удалось открыть базу данных:\n{str(e)}"
-            )
+        self.run_queries("tables", [
+            ("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name", ())
+        ])
+    
+    def show_tables(self, names):
+        """Заполнить список таблиц."""
+        self._table_names = set(names)
+        self.tables_list.addItems(names)
+    
+    def refresh_schema(self):
+        """Перечитать список таблиц и колонки (после изменения схемы извне)."""
+        self._tables_cache.pop(self.db_path, None)
+        self._columns_cache.pop(self.db_path, None)
+        self._row_counts.clear()
+        self.clear_page_cache()
+        self.load_tables()
     
     def on_table_selection_changed(self):
         """Обработчик изменения выбора таблицы."""
@@ -437,91 +827,239 @@ class DatabaseViewerWindow(QMainWindow):
         item = self.tables_list.currentItem()
         if not item:
             return
+        if item.text() not in self._table_names:
+            # Имя попадает в SQL (PRAGMA не принимает параметры) - только известные таблицы
+            QMessageBox.warning(self, "Ошибка", f"Таблица не найдена: {item.text()}")
+            return
         
         self.current_table = item.text()
         self.page = 0
+        self._page_cursors = [None]
+        self.clear_page_cache()
         self.table_title.setText(f"📊 Таблица: {self.current_table}")
         
         self.load_columns()
-        self.load_data()
         
         self.create_btn.setEnabled(True)
         self.refresh_btn.setEnabled(True)
     
     def load_columns(self):
-        """Загрузить информацию о колонках таблицы."""
-        if not self.db_path or not self.current_table:
+        """Загрузить информацию о колонках таблицы (затем - первую страницу)."""
+        if not self.current_table:
             return
         
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute(f"PRAGMA table_info({self.current_table})")
-            columns_info = cursor.fetchall()
-            self.columns = [col[1] for col in columns_info]
-            
-            conn.close()
-            
-        except sqlite3.Error as e:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка загрузки колонок:\n{str(e)}")
+        schema = self._columns_cache.get(self.db_path, {}).get(self.current_table)
+        if schema is not None:
+            self.apply_columns(*schema)
+            return
+        
+        # Колонки и CREATE TABLE (для WITHOUT ROWID) - за одно обращение к потоку БД
+        self.run_queries("columns", [
+            (f"PRAGMA table_info({quote_identifier(self.current_table)})", ()),
+            ("SELECT sql FROM sqlite_master WHERE type='table' AND name = ?",
+             (self.current_table,)),
+        ], (self.current_table, None))
+    
+    def apply_columns(self, columns_info, without_rowid=False):
+        """Принять описание колонок из PRAGMA table_info и загрузить данные."""
+        self.columns = [col[1] for col in columns_info]
+        # col[5] - позиция колонки в первичном ключе (0 - не входит)
+        pk_cols = [col[1] for col in sorted(columns_info, key=lambda col: col[5]) if col[5]]
+        lowered = {col.lower() for col in self.columns}
+        rowid = None if without_rowid else next(
+            (alias for alias in ROWID_ALIASES if alias not in lowered), None)
+        
+        self._rowid_col = None
+        self._key_unique = True
+        if len(pk_cols) == 1:
+            self._key_cols = pk_cols
+        elif rowid is not None:
+            # Нет ключа из одной колонки - записи находятся по скрытому rowid
+            self._rowid_col = rowid
+            self._key_cols = [rowid]
+        elif pk_cols:
+            # WITHOUT ROWID с составным ключом
+            self._key_cols = pk_cols
+        else:
+            # rowid заслонён колонками, ключа нет - остаётся первая колонка
+            self._key_cols = self.columns[:1]
+            self._key_unique = False
+        self._seek_col = (
+            self._key_cols[0] if self._key_unique and len(self._key_cols) == 1 else None
+        )
+        
+        self.prepare_statements()
+        self.load_data()
+    
+    def prepare_statements(self):
+        """Сформировать SQL запросов для текущей таблицы (один раз при открытии)."""
+        table = quote_identifier(self.current_table)
+        cols = [quote_identifier(col) for col in self.columns]
+        # rowid - встроенное имя: в кавычках SQLite принял бы его за строку
+        keys = [
+            col if col == self._rowid_col else quote_identifier(col)
+            for col in self._key_cols
+        ]
+        key_where = " AND ".join(f"{key} = ?" for key in keys)
+        select = f"SELECT {self._rowid_col} AS {self._rowid_col}, *" if self._rowid_col else "SELECT *"
+        
+        self._sql_count = f"SELECT COUNT(*) FROM {table}"
+        if self._seek_col is None:
+            order = f" ORDER BY {', '.join(keys)}" if self._key_unique else ""
+            self._sql_page = f"{select} FROM {table}{order} LIMIT ? OFFSET ?"
+            self._sql_seek_page = None
+        else:
+            # Страницы по ключу: следующая читается с места, где кончилась
+            # предыдущая, без пропуска OFFSET строк
+            key = keys[0]
+            self._sql_page = f"{select} FROM {table} ORDER BY {key} LIMIT ? OFFSET ?"
+            self._sql_seek_page = f"{select} FROM {table} WHERE {key} > ? ORDER BY {key} LIMIT ?"
+        self._sql_insert = (
+            f"INSERT INTO {table} ({', '.join(cols)}) "
+            f"VALUES ({', '.join('?' for _ in cols)})"
+        )
+        self._sql_update = (
+            f"UPDATE {table} SET {', '.join(f'{col} = ?' for col in cols)} "
+            f"WHERE {key_where}"
+        )
+        self._sql_delete = f"DELETE FROM {table} WHERE {key_where}"
+        # Для ключа из одной колонки список "?" под IN дописывает delete_queries
+        self._sql_delete_in = f"DELETE FROM {table} WHERE {keys[0]} IN " if keys else None
+        self._sql_select_row = f"{select} FROM {table} WHERE {key_where}"
+    
+    def row_key(self, row):
+        """Значения ключевых колонок строки страницы (параметры WHERE)."""
+        values = self.model.row_values(row)
+        return tuple(values[col] for col in self._key_cols)
     
     def load_data(self):
         """Загрузить данные таблицы с пагинацией."""
-        if not self.db_path or not self.current_table:
+        if not self.current_table or not self.columns:
             return
         
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Получаем общее количество записей
-            cursor.execute(f"SELECT COUNT(*) FROM {self.current_table}")
-            self.total_rows = cursor.fetchone()[0]
-            
-            # Получаем данные с пагинацией
-            offset = self.page * self.page_size
-            cursor.execute(
-                f"SELECT * FROM {self.current_table} LIMIT ? OFFSET ?",
-                (self.page_size, offset)
-            )
-            rows = cursor.fetchall()
-            
-            conn.close()
-            
-            # Заполняем таблицу
-            self.data_table.clear()
-            self.data_table.setColumnCount(len(self.columns))
-            self.data_table.setRowCount(len(rows))
-            self.data_table.setHorizontalHeaderLabels(self.columns)
-            
-            for row_idx, row in enumerate(rows):
-                for col_idx, value in enumerate(row):
-                    item = QTableWidgetItem(str(value) if value is not None else "")
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)
-                    self.data_table.setItem(row_idx, col_idx, item)
-            
-            # Обновляем пагинацию
-            total_pages = max(1, (self.total_rows + self.page_size - 1) // self.page_size)
-            self.page_label.setText(f"Страница: {self.page + 1} / {total_pages}")
-            self.total_label.setText(f"Всего записей: {self.total_rows}")
-            
-            self.prev_btn.setEnabled(self.page > 0)
-            self.next_btn.setEnabled((self.page + 1) * self.page_size < self.total_rows)
-            
-            self.update_btn.setEnabled(False)
-            self.delete_btn.setEnabled(False)
-            
-        except sqlite3.Error as e:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка загрузки данных:\n{str(e)}")
+        queries = [self.page_query(self.page)]
+        
+        # Общее количество записей - только если оно ещё не известно
+        if self.current_table not in self._row_counts:
+            queries.insert(0, (self._sql_count, ()))
+        
+        self._page_request += 1
+        self._page_shown = 0
+        self.run_queries("page", queries, (self.current_table, self._page_request))
+    
+    def page_query(self, page):
+        """Запрос (sql, params) для страницы page."""
+        # Страница читается с одной лишней строкой: по ней видно, есть ли следующая
+        limit = self.page_size + 1
+        start_key = (
+            self._page_cursors[page]
+            if page < len(self._page_cursors) else None
+        )
+        if self._sql_seek_page is not None and start_key is not None:
+            return (self._sql_seek_page, (start_key, limit))
+        return (self._sql_page, (limit, page * self.page_size))
+    
+    def prefetch_next_page(self):
+        """Прочитать следующую страницу заранее, пока пользователь смотрит текущую."""
+        page = self.page + 1
+        if not self.current_table or not self._has_next or page in self._page_cache:
+            return
+        self.run_queries("prefetch", [self.page_query(page)],
+                         (self.current_table, (page, self._page_cache_gen)))
+    
+    def clear_page_cache(self):
+        """Забыть заранее прочитанные страницы."""
+        self._page_cache.clear()
+        self._page_cache_gen += 1
+    
+    def on_rows_fetched(self, tag, batch, context):
+        """Показать очередную пачку строк страницы, не дожидаясь остальных."""
+        if context != (self.current_table, self._page_request):
+            return
+        # Лишняя строка-проба в таблицу не попадает
+        batch = batch[:self.page_size - self._page_shown]
+        if not batch:
+            return
+        if self._page_shown == 0:
+            # Прежняя страница видна до прихода первой пачки новой
+            self.model.set_page(self.columns, list(batch))
+        else:
+            self.model.append_rows(batch)
+        self._page_shown += len(batch)
+    
+    def show_page(self, rows):
+        """Показать загруженную страницу (rows - с лишней строкой, если она есть)."""
+        self._has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.total_rows = self._row_counts.get(self.current_table, 0)
+        
+        if self._seek_col is not None:
+            # Запоминаем ключ начала следующей страницы
+            del self._page_cursors[self.page + 1:]
+            self._page_cursors.append(rows[-1][self._seek_col] if rows else None)
+        
+        # Строки уже в таблице (пришли пачками), пустую страницу показываем здесь
+        if not rows:
+            self.model.set_page(self.columns, [])
+        
+        self.update_page_labels()
+        self._set_loading(False)
+        
+        self.update_btn.setEnabled(False)
+        self.delete_btn.setEnabled(False)
+        
+        QTimer.singleShot(0, self.prefetch_next_page)
+    
+    def update_page_labels(self):
+        """Обновить номер страницы и число записей."""
+        total_pages = max(1, (self.total_rows + self.page_size - 1) // self.page_size)
+        self.page_label.setText(f"Страница: {self.page + 1} / {total_pages}")
+        self.total_label.setText(f"Всего записей: {self.total_rows}")
+    
+    def _change_row_count(self, delta):
+        """Поправить известное число записей текущей таблицы."""
+        if self.current_table in self._row_counts:
+            self._row_counts[self.current_table] += delta
+            self.total_rows = self._row_counts[self.current_table]
+    
+    def apply_created_row(self):
+        """Показать добавленную запись: перечитать только текущую страницу.
+        
+        Новая строка может встать в любое место порядка ключа, поэтому
+        страница перечитывается, а COUNT(*) - нет.
+        """
+        self._change_row_count(1)
+        self.load_data()
+    
+    def apply_updated_row(self, row, fetched):
+        """Заменить изменённую строку на странице значениями из БД."""
+        if self._key_unique and len(fetched) == 1:
+            self.model.update_row(row, fetched[0])
+        else:
+            # Ключ изменился (или его нет) - место строки на странице неизвестно
+            self.load_data()
+    
+    def apply_deleted_rows(self, rows):
+        """Убрать удалённые записи со страницы без перечитывания."""
+        if self._key_unique:
+            # С конца, чтобы номера оставшихся строк не сдвигались
+            for row in sorted(rows, reverse=True):
+                self.model.remove_row(row)
+            self._change_row_count(-len(rows))
+            self.update_page_labels()
+        else:
+            # Без однозначного ключа могло удалиться несколько строк
+            self._row_counts.pop(self.current_table, None)
+            self.load_data()
     
     def clear_data_view(self):
         """Очистить представление данных."""
         self.current_table = None
         self.columns = []
-        self.data_table.clear()
-        self.data_table.setRowCount(0)
-        self.data_table.setColumnCount(0)
+        self._key_cols = []
+        self._rowid_col = None
+        self._seek_col = None
+        self.model.set_page([], [])
         self.table_title.setText("Выберите таблицу")
         self.page_label.setText("Страница: 0 / 0")
         self.total_label.setText("Всего записей: 0")
@@ -534,46 +1072,81 @@ class DatabaseViewerWindow(QMainWindow):
     
     def on_row_selection_changed(self):
         """Обработчик изменения выбора строки."""
-        has_selection = bool(self.data_table.selectedItems())
-        self.update_btn.setEnabled(has_selection)
-        self.delete_btn.setEnabled(has_selection)
+        count = len(self.data_table.selectionModel().selectedRows())
+        # Изменять можно только одну запись, удалять - несколько сразу
+        self.update_btn.setEnabled(count == 1)
+        self.delete_btn.setEnabled(count > 0)
     
     def prev_page(self):
         """Перейти на предыдущую страницу."""
+        if self._loading:
+            return
         if self.page > 0:
             self.page -= 1
             self.load_data()
     
     def next_page(self):
         """Перейти на следующую страницу."""
-        if (self.page + 1) * self.page_size < self.total_rows:
+        if self._loading:
+            return
+        if self._has_next:
             self.page += 1
-            self.load_data()
+            rows = self._page_cache.pop(self.page, None)
+            if rows is None:
+                self.load_data()
+                return
+            # Страница уже прочитана: показываем сразу, без запроса
+            self._page_request += 1
+            self._page_shown = 0
+            self.model.set_page(self.columns, rows[:self.page_size])
+            self.show_page(rows)
     
     def on_page_size_changed(self, value):
-        """Обработчик изменения размера страницы."""
+        """Обработчик изменения размера страницы (применяется после паузы)."""
+        self._page_size_timer.start()
+    
+    def apply_page_size(self):
+        """Применить размер страницы из поля и загрузить первую страницу."""
+        value = self.page_size_spin.value()
+        if value == self.page_size:
+            return
         self.page_size = value
         self.page = 0
+        self._page_cursors = [None]
+        self.clear_page_cache()
         if self.current_table:
             self.load_data()
     
     def refresh_data(self):
         """Обновить данные таблицы."""
         if self.current_table:
+            self._row_counts.pop(self.current_table, None)
+            self.clear_page_cache()
             self.load_data()
     
+    def selected_rows(self):
+        """Номера выбранных строк на странице."""
+        return [index.row() for index in self.data_table.selectionModel().selectedRows()]
+    
+    def selected_row(self):
+        """Номер выбранной строки на странице (или None)."""
+        rows = self.selected_rows()
+        return rows[0] if rows else None
+    
     def get_selected_row_data(self):
         """Получить данные выбранной строки."""
-        selected_rows = self.data_table.selectionModel().selectedRows()
-        if not selected_rows:
+        row = self.selected_row()
+        if row is None:
             return None
+        values = self.model.row_values(row)
+        return {col: values[col] for col in self.columns}
+    
+    def record_params(self, values):
+        """Параметры INSERT/UPDATE из полей диалога: пустое поле - NULL.
         
-        row_idx = selected_rows[0].row()
-        data = {}
-        for col_idx, col_name in enumerate(self.columns):
-            item = self.data_table.item(row_idx, col_idx)
-            data[col_name] = item.text() if item else ""
-        return data
+        Сравнение именно с "", чтобы "0" и другие значения сохранялись как есть.
+        """
+        return [None if values[col] == "" else values[col] for col in self.columns]
     
     def create_record(self):
         """Создать новую запись."""
@@ -583,30 +1156,12 @@ class DatabaseViewerWindow(QMainWindow):
         dialog = RecordDialog(self.columns, parent=self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             values = dialog.get_values()
-            
-            try:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                cols = ", ".join(self.columns)
-                placeholders = ", ".join(["?" for _ in self.columns])
-                vals = [values[col] if values[col] else None for col in self.columns]
-                
-                cursor.execute(
-                    f"INSERT INTO {self.current_table} ({cols}) VALUES ({placeholders})",
-                    vals
-                )
-                conn.commit()
-                conn.close()
-                
-                QMessageBox.information(self, "Успех", "Запись успешно создана!")
-                self.load_data()
-                
-            except sqlite3.Error as e:
-                QMessageBox.critical(self, "Ошибка", f"Ошибка создания записи:\n{str(e)}")
+            self.run_queries("create", [(self._sql_insert, self.record_params(values))],
+                             (self.current_table, None))
     
     def update_record(self):
         """Обновить выбранную запись."""
+        row = self.selected_row()
         row_data = self.get_selected_row_data()
         if not row_data:
             return
@@ -614,67 +1169,57 @@ class DatabaseViewerWindow(QMainWindow):
         dialog = RecordDialog(self.columns, row_data, parent=self)
         if dialog.exec() == QDialog.DialogCode.Accepted:
             new_values = dialog.get_values()
+            key = self.row_key(row)
             
-            try:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                # Используем первую колонку как идентификатор (обычно id)
-                id_col = self.columns[0]
-                id_val = row_data[id_col]
-                
-                set_clause = ", ".join([f"{col} = ?" for col in self.columns])
-                vals = [new_values[col] if new_values[col] else None for col in self.columns]
-                vals.append(id_val)
-                
-                cursor.execute(
-                    f"UPDATE {self.current_table} SET {set_clause} WHERE {id_col} = ?",
-                    vals
-                )
-                conn.commit()
-                conn.close()
-                
-                QMessageBox.information(self, "Успех", "Запись успешно обновлена!")
-                self.load_data()
-                
-            except sqlite3.Error as e:
-                QMessageBox.critical(self, "Ошибка", f"Ошибка обновления записи:\n{str(e)}")
+            vals = self.record_params(new_values)
+            vals.extend(key)
+            
+            # Вместе с UPDATE читаем строку обратно, чтобы обновить только её
+            self.run_queries("update", [
+                (self._sql_update, vals),
+                (self._sql_select_row, key),
+            ], (self.current_table, row))
     
     def delete_record(self):
-        """Удалить выбранную запись."""
-        row_data = self.get_selected_row_data()
-        if not row_data:
+        """Удалить выбранные записи."""
+        rows = self.selected_rows()
+        if not rows:
             return
         
+        question = ("Вы уверены, что хотите удалить эту запись?" if len(rows) == 1
+                    else f"Вы уверены, что хотите удалить записи ({len(rows)})?")
         reply = QMessageBox.question(
             self,
             "Подтверждение",
-            "Вы уверены, что хотите удалить эту запись?",
+            question,
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
             QMessageBox.StandardButton.No
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            try:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                # Используем первую колонку как идентификатор
-                id_col = self.columns[0]
-                id_val = row_data[id_col]
-                
-                cursor.execute(
-                    f"DELETE FROM {self.current_table} WHERE {id_col} = ?",
-                    (id_val,)
-                )
-                conn.commit()
-                conn.close()
-                
-                QMessageBox.information(self, "Успех", "Запись успешно удалена!")
-                self.load_data()
-                
-            except sqlite3.Error as e:
-                QMessageBox.critical(self, "Ошибка", f"Ошибка удаления записи:\n{str(e)}")
+            keys = [self.row_key(row) for row in rows]
+            # Все пачки ключей идут одной транзакцией
+            self.run_queries("delete", self.delete_queries(keys), (self.current_table, rows))
+    
+    def delete_queries(self, keys):
+        """Запросы DELETE ... IN (...) по DELETE_CHUNK_SIZE ключей.
+        
+        Составной ключ удаляется построчно через executemany.
+        """
+        if len(self._key_cols) != 1:
+            return [(self._sql_delete, ParamRows(keys))]
+        ids = [key[0] for key in keys]
+        queries = []
+        for start in range(0, len(ids), DELETE_CHUNK_SIZE):
+            chunk = tuple(ids[start:start + DELETE_CHUNK_SIZE])
+            placeholders = ", ".join("?" * len(chunk))
+            queries.append((f"{self._sql_delete_in}({placeholders})", chunk))
+        return queries
+    
+    def closeEvent(self, event):
+        """Закрыть соединение с БД вместе с окном."""
+        self.stop_worker()
+        super().closeEvent(event)
 
 
 def main():
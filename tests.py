@@ -4,15 +4,64 @@
 """
 
 import unittest
+import asyncio
 import os
+import sqlite3
 import sys
+import tempfile
+import time
+from datetime import date, timedelta
 from pathlib import Path
 
-# Добавляем путь к модулям
-sys.path.insert(0, str(Path(__file__).parent))
+import httpx
 
 from models import Prompt, Model, Result, Settings
 import db
+import network
+
+
+# Общая БД в памяти: данные тестов не попадают в chatlist.db, записи не ждут диска
+TEST_DB_URI = "file:chatlist_tests?mode=memory&cache=shared"
+
+
+class MemoryConnectionPool(db.ConnectionPool):
+    """Пул к общей БД в памяти.
+    
+    В режиме общего кэша незавершённое чтение (например, недочитанный
+    генератор get_selected_results) блокирует запись в таблицу другими
+    подключениями; read_uncommitted снимает блокировки чтения, как WAL
+    на файловой БД.
+    """
+    
+    def _connect(self):
+        conn = super()._connect()
+        conn.execute("PRAGMA read_uncommitted = ON")
+        return conn
+
+
+_saved_pool = None
+# БД в памяти живёт, пока открыто хотя бы одно подключение к ней
+_keepalive_conn = None
+
+
+def setUpModule():
+    """Подменить пул подключений на БД в памяти и один раз создать схему."""
+    global _saved_pool, _keepalive_conn
+    _keepalive_conn = sqlite3.connect(TEST_DB_URI, uri=True)
+    _saved_pool = db._pool
+    db._pool = MemoryConnectionPool(TEST_DB_URI, uri=True)
+    db._invalidate_settings_cache()
+    db._invalidate_models_cache()
+    db.ensure_initialized()
+
+
+def tearDownModule():
+    """Вернуть пул рабочей БД."""
+    db._pool.close_all()
+    db._pool = _saved_pool
+    db._invalidate_settings_cache()
+    db._invalidate_models_cache()
+    _keepalive_conn.close()
 
 
 class TestPromptsCRUD(unittest.TestCase):
@@ -30,6 +79,18 @@ class TestPromptsCRUD(unittest.TestCase):
         # Удаляем тестовые данные
         db.delete_prompt(prompt_id)
     
+    def test_create_prompts_bulk(self):
+        """Тест создания нескольких промптов одной транзакцией."""
+        texts = [f"Пакетный промпт_5207 {i}" for i in range(3)]
+        prompt_ids = db.create_prompts_bulk([Prompt(text=text) for text in texts])
+        
+        self.assertEqual(len(prompt_ids), 3)
+        self.assertEqual(len(set(prompt_ids)), 3)
+        self.assertEqual([db.get_prompt(pid).text for pid in prompt_ids], texts)
+        
+        for prompt_id in prompt_ids:
+            db.delete_prompt(prompt_id)
+    
     def test_get_prompt(self):
         """Тест получения промпта по ID."""
         # Создаём промпт
@@ -53,21 +114,23 @@ class TestPromptsCRUD(unittest.TestCase):
     
     def test_get_all_prompts(self):
         """Тест получения списка промптов."""
-        # Создаём несколько промптов
-        ids = []
-        for i in range(3):
-            prompt = Prompt(text=f"Тестовый промпт {i}")
-            ids.append(db.create_prompt(prompt))
-        
-        # Получаем список
-        prompts = db.get_all_prompts(limit=100)
-        
-        self.assertIsInstance(prompts, list)
-        self.assertGreaterEqual(len(prompts), 3)
-        
-        # Удаляем тестовые данные
-        for pid in ids:
-            db.delete_prompt(pid)
+        for count in (1, 3, 10):
+            with self.subTest(count=count):
+                # Создаём несколько промптов
+                ids = db.create_prompts_bulk(
+                    [Prompt(text=f"Тестовый промпт {i}") for i in range(count)]
+                )
+                
+                # Получаем список
+                prompts = db.get_all_prompts(limit=100)
+                
+                self.assertIsInstance(prompts, list)
+                self.assertGreaterEqual(len(prompts), count)
+                self.assertTrue(set(ids) <= {p.id for p in prompts})
+                
+                # Удаляем тестовые данные
+                for pid in ids:
+                    db.delete_prompt(pid)
     
     def test_search_prompts(self):
         """Тест поиска промптов по тексту."""
@@ -76,16 +139,62 @@ class TestPromptsCRUD(unittest.TestCase):
         prompt = Prompt(text=unique_text)
         prompt_id = db.create_prompt(prompt)
         
-        # Ищем
-        results = db.get_all_prompts(search="УНИКАЛЬНЫЙ_ТЕКСТ")
-        
-        self.assertGreaterEqual(len(results), 1)
-        found = any(p.text == unique_text for p in results)
-        self.assertTrue(found)
+        # Ищем: один промпт на все запросы, варианты - простым циклом
+        for query, should_find in (
+            ("УНИКАЛЬНЫЙ_ТЕКСТ", True),
+            ("ДЛЯ_ПОИСКА_12345", True),
+            ("НЕСУЩЕСТВУЮЩИЙ_ТЕКСТ_31337", False),
+        ):
+            with self.subTest(query=query):
+                found_ids = {p.id for p in db.get_all_prompts(search=query)}
+                self.assertEqual(prompt_id in found_ids, should_find)
         
         # Удаляем тестовые данные
         db.delete_prompt(prompt_id)
     
+    def test_search_prompts_substring(self):
+        """Тест поиска по подстроке без учёта регистра и по коротким запросам."""
+        unique_text = "Промпт с подстрокой ЩЪЁЮЖ_9876 внутри"
+        prompt_id = db.create_prompt(Prompt(text=unique_text))
+        
+        for query in ("щъёюж_98", "ЪЁЮ", "Щ"):
+            found_ids = {p.id for p in db.get_all_prompts(search=query, limit=1000)}
+            self.assertIn(prompt_id, found_ids, f"Промпт не найден по запросу {query!r}")
+        
+        db.delete_prompt(prompt_id)
+    
+    def test_get_prompt_previews(self):
+        """Тест коротких строк истории: дата, обрезка и перевод строк."""
+        long_text = "Первая строка превью_5173\n" + "x" * 60
+        prompt_id = db.create_prompt(Prompt(text=long_text))
+        prompt = db.get_prompt(prompt_id)
+        
+        previews = dict(db.get_prompt_previews(search="превью_5173"))
+        
+        created = prompt.created_at[8:10] + "." + prompt.created_at[5:7]
+        expected = f"[{created}] " + long_text[:50].replace("\n", " ") + "..."
+        self.assertEqual(previews[prompt_id], expected)
+        
+        db.delete_prompt(prompt_id)
+    
+    def test_get_prompt_previews_pages(self):
+        """Тест постраничной выборки истории: страницы не пересекаются."""
+        prompt_ids = db.create_prompts_bulk(
+            [Prompt(text=f"Страница истории_8361 {i}") for i in range(5)]
+        )
+        
+        first = db.get_prompt_previews(search="истории_8361", limit=3)
+        second = db.get_prompt_previews(search="истории_8361", limit=3, offset=3)
+        
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertEqual(
+            sorted(pid for pid, _ in first + second), sorted(prompt_ids)
+        )
+        
+        for prompt_id in prompt_ids:
+            db.delete_prompt(prompt_id)
+    
     def test_delete_prompt(self):
         """Тест удаления промпта."""
         prompt = Prompt(text="Промпт для удаления")
@@ -179,6 +288,39 @@ class TestModelsCRUD(unittest.TestCase):
         
         db.delete_model(model_id)
     
+    def test_models_cache_returns_copies(self):
+        """Тест: изменение полученных моделей не портит кэш, запись сбрасывает его."""
+        first = db.get_all_models()
+        first[0].name = "Изменено без сохранения"
+        self.assertNotEqual(db.get_all_models()[0].name, "Изменено без сохранения")
+        
+        model_id = db.create_model(Model(name="Cache Model", api_url="https://cache.api/v1", api_id="cache"))
+        self.assertIn(model_id, [m.id for m in db.get_all_models()])
+        db.delete_model(model_id)
+        self.assertNotIn(model_id, [m.id for m in db.get_all_models()])
+    
+    def test_save_models_bulk(self):
+        """Тест пакетного обновления и добавления моделей."""
+        existing = Model(name="Bulk Existing", api_url="https://old.api/v1", api_id="bulk-old")
+        existing.id = db.create_model(existing)
+        existing.name = "Bulk Existing Updated"
+        existing.is_active = False
+        new = [
+            Model(name=f"Bulk New {i}", api_url="https://new.api/v1", api_id=f"bulk-new-{i}")
+            for i in range(2)
+        ]
+        
+        db.save_models_bulk([existing], new)
+        
+        updated = db.get_model(existing.id)
+        self.assertEqual(updated.name, "Bulk Existing Updated")
+        self.assertFalse(updated.is_active)
+        created = [m for m in db.get_all_models() if m.name.startswith("Bulk New")]
+        self.assertEqual(sorted(m.api_id for m in created), ["bulk-new-0", "bulk-new-1"])
+        
+        for model in [updated] + created:
+            db.delete_model(model.id)
+    
     def test_delete_model(self):
         """Тест удаления модели."""
         model = Model(
@@ -198,28 +340,28 @@ class TestModelsCRUD(unittest.TestCase):
 class TestResultsCRUD(unittest.TestCase):
     """Тесты CRUD-операций для результатов."""
     
-    @classmethod
-    def setUpClass(cls):
-        """Создание тестовых данных."""
-        # Создаём промпт для тестов
-        cls.test_prompt = Prompt(text="Промпт для тестов результатов")
-        cls.prompt_id = db.create_prompt(cls.test_prompt)
-        
-        # Получаем первую модель
+    def setUp(self):
+        """Первая модель из БД (без моделей тесты пропускаются)."""
         models = db.get_all_models()
-        cls.model_id = models[0].id if models else None
+        if not models:
+            self.skipTest("Нет моделей в БД")
+        self.model_id = models[0].id
+        self._prompt_id = None
     
-    @classmethod
-    def tearDownClass(cls):
-        """Удаление тестовых данных."""
-        if cls.prompt_id:
-            db.delete_prompt(cls.prompt_id)
+    @property
+    def prompt_id(self):
+        """ID собственного промпта теста (создаётся при первом обращении).
+        
+        Промпт удаляется после теста вместе с его результатами (ON DELETE CASCADE),
+        поэтому тесты не зависят друг от друга и от порядка запуска.
+        """
+        if self._prompt_id is None:
+            self._prompt_id = db.create_prompt(Prompt(text="Промпт для тестов результатов"))
+            self.addCleanup(db.delete_prompt, self._prompt_id)
+        return self._prompt_id
     
     def test_create_result(self):
         """Тест создания результата."""
-        if not self.model_id:
-            self.skipTest("Нет моделей в БД")
-        
         result = Result(
             prompt_id=self.prompt_id,
             model_id=self.model_id,
@@ -233,11 +375,42 @@ class TestResultsCRUD(unittest.TestCase):
         
         db.delete_result(result_id)
     
+    def test_create_results_bulk(self):
+        """Тест создания нескольких результатов одной транзакцией."""
+        results = [
+            Result(
+                prompt_id=self.prompt_id,
+                model_id=self.model_id,
+                response_text=f"Пакетный ответ {i}"
+            )
+            for i in range(3)
+        ]
+        result_ids = db.create_results_bulk(results)
+        
+        self.assertEqual(len(result_ids), 3)
+        self.assertEqual(len(set(result_ids)), 3)
+        saved = {r.id: r.response_text for r in db.get_results_for_prompt(self.prompt_id)}
+        for i, result_id in enumerate(result_ids):
+            self.assertEqual(saved[result_id], f"Пакетный ответ {i}")
+        
+        for result_id in result_ids:
+            db.delete_result(result_id)
+    
+    def test_get_cached_responses(self):
+        """Тест поиска сохранённого ответа на такой же промпт."""
+        prompt_id = db.create_prompt(Prompt(text="Промпт  для\nкэша ответов_4411"))
+        db.create_result(Result(prompt_id=prompt_id, model_id=self.model_id, response_text="Старый ответ"))
+        db.create_result(Result(prompt_id=prompt_id, model_id=self.model_id, response_text="Новый ответ"))
+        
+        # Различия в пробелах не влияют на совпадение
+        cached = db.get_cached_responses("Промпт для кэша ответов_4411", [self.model_id])
+        self.assertEqual(cached, {self.model_id: "Новый ответ"})
+        self.assertEqual(db.get_cached_responses("Другой промпт_4411", [self.model_id]), {})
+        
+        db.delete_prompt(prompt_id)
+    
     def test_get_results_for_prompt(self):
         """Тест получения результатов для промпта."""
-        if not self.model_id:
-            self.skipTest("Нет моделей в БД")
-        
         # Создаём результат
         result = Result(
             prompt_id=self.prompt_id,
@@ -256,9 +429,6 @@ class TestResultsCRUD(unittest.TestCase):
     
     def test_update_result_selection(self):
         """Тест обновления статуса избранного."""
-        if not self.model_id:
-            self.skipTest("Нет моделей в БД")
-        
         result = Result(
             prompt_id=self.prompt_id,
             model_id=self.model_id,
@@ -271,17 +441,40 @@ class TestResultsCRUD(unittest.TestCase):
         success = db.update_result_selection(result_id, True)
         self.assertTrue(success)
         
-        # Проверяем через get_selected_results
-        selected = db.get_selected_results()
-        found = any(r.id == result_id for r in selected)
-        self.assertTrue(found)
+        # Проверяем через get_selected_results (генератор читается до конца)
+        selected_ids = {r.id for r in db.get_selected_results()}
+        self.assertIn(result_id, selected_ids)
         
         db.delete_result(result_id)
+    
+    def test_update_results_selection(self):
+        """Тест массового обновления статуса избранного."""
+        result_ids = [
+            db.create_result(Result(
+                prompt_id=self.prompt_id,
+                model_id=self.model_id,
+                response_text=f"Ответ {i} для массового обновления"
+            ))
+            for i in range(3)
+        ]
+        
+        updated = db.update_results_selection(result_ids, True)
+        self.assertEqual(updated, 3)
+        
+        selected_ids = {r.id for r in db.get_selected_results()}
+        self.assertTrue(set(result_ids) <= selected_ids)
+        
+        for result_id in result_ids:
+            db.delete_result(result_id)
 
 
 class TestSettingsCRUD(unittest.TestCase):
     """Тесты функций настроек."""
     
+    def setUp(self):
+        """Вернуть настройки к исходным после теста (даже если он упал)."""
+        self.addCleanup(db.save_settings, db.get_all_settings())
+    
     def test_get_setting(self):
         """Тест получения настройки."""
         # Настройка theme должна существовать из seed_db
@@ -295,13 +488,12 @@ class TestSettingsCRUD(unittest.TestCase):
     
     def test_set_setting(self):
         """Тест установки настройки."""
+        # Очистка - пустое значение (test_key нет в Settings)
+        self.addCleanup(db.set_setting, "test_key", "")
         db.set_setting("test_key", "test_value")
         
         value = db.get_setting("test_key")
         self.assertEqual(value, "test_value")
-        
-        # Очистка - устанавливаем пустое значение
-        db.set_setting("test_key", "")
     
     def test_get_all_settings(self):
         """Тест получения всех настроек."""
@@ -313,9 +505,6 @@ class TestSettingsCRUD(unittest.TestCase):
     
     def test_save_settings(self):
         """Тест сохранения настроек."""
-        # Сохраняем текущие настройки
-        original = db.get_all_settings()
-        
         # Меняем
         new_settings = Settings(
             theme="light",
@@ -328,103 +517,249 @@ class TestSettingsCRUD(unittest.TestCase):
         loaded = db.get_all_settings()
         self.assertEqual(loaded.theme, "light")
         self.assertEqual(loaded.request_timeout, 60)
-        
-        # Восстанавливаем оригинальные настройки
-        db.save_settings(original)
 
 
 class TestDateFilter(unittest.TestCase):
     """Тесты фильтрации по дате."""
     
+    # (сдвиг начала и конца диапазона от сегодня в днях, должен ли найтись промпт)
+    DATE_RANGES = [
+        (-1, 1, True),
+        (-31, -30, False),
+    ]
+    
+    @classmethod
+    def setUpClass(cls):
+        """Границы диапазонов в ISO-формате - один раз на класс."""
+        today = date.today()
+        cls.date_windows = [
+            (
+                (today + timedelta(days=days_from)).isoformat(),
+                (today + timedelta(days=days_to)).isoformat(),
+                should_find,
+            )
+            for days_from, days_to, should_find in cls.DATE_RANGES
+        ]
+    
+    def setUp(self):
+        """Промпт с текущей датой."""
+        self.prompt_id = db.create_prompt(Prompt(text="Промпт для теста фильтра по дате"))
+        self.addCleanup(db.delete_prompt, self.prompt_id)
+    
     def test_filter_by_date_range(self):
         """Тест фильтрации промптов по диапазону дат."""
-        # Создаём промпт (он будет с текущей датой)
-        prompt = Prompt(text="Промпт для теста фильтра по дате")
-        prompt_id = db.create_prompt(prompt)
+        for date_from, date_to, should_find in self.date_windows:
+            with self.subTest(date_from=date_from, date_to=date_to):
+                found_ids = {p.id for p in db.get_all_prompts(
+                    date_from=date_from, date_to=date_to
+                )}
+                self.assertEqual(self.prompt_id in found_ids, should_find)
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Тесты пула подключений."""
+    
+    def test_exit_without_queries_keeps_file_untouched(self):
+        """Без запросов обработчик выхода не открывает и не создаёт файл БД."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "unused.db"
+            saved_pool = db._pool
+            db._pool = db.ConnectionPool(path)
+            try:
+                db._optimize_and_close()
+            finally:
+                db._pool = saved_pool
+            self.assertFalse(path.exists())
+
+
+class TestNetwork(unittest.TestCase):
+    """Тесты сетевых функций без обращения к реальным API.
+    
+    Один подменный HTTP-клиент (httpx.MockTransport) создаётся на весь класс;
+    каждый тест задаёт только ответ сервера через serve().
+    """
+    
+    API_URL = "https://test.api/v1/chat/completions"
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.loop = asyncio.new_event_loop()
+        cls.requests = []
+        cls.respond = None
         
-        from datetime import date, timedelta
-        today = date.today()
-        yesterday = today - timedelta(days=1)
-        tomorrow = today + timedelta(days=1)
+        def handler(request):
+            cls.requests.append(request)
+            return cls.respond(request)
         
-        # Фильтруем с датой, включающей сегодня
-        results = db.get_all_prompts(
-            date_from=yesterday.isoformat(),
-            date_to=tomorrow.isoformat()
-        )
+        cls._saved_client = (network._http_client, network._http_client_loop)
+        network._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        network._http_client_loop = cls.loop
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.run_until_complete(network._http_client.aclose())
+        network._http_client, network._http_client_loop = cls._saved_client
+        cls.loop.close()
+    
+    def setUp(self):
+        self.requests.clear()
+        self.model = Model(id=1, name="Test", api_url=self.API_URL, api_id="test-model")
+        self.client = network.LLMClient()
+        self.client.set_custom_api_key("test-key")
+    
+    def serve(self, respond):
+        """Отвечать на запросы функцией respond(request) -> httpx.Response."""
+        type(self).respond = respond
+    
+    def run_async(self, coro):
+        return self.loop.run_until_complete(coro)
+    
+    def test_send_prompt(self):
+        """Тест разбора ответа OpenAI-совместимого API."""
+        self.serve(lambda request: httpx.Response(200, json={
+            "choices": [{"message": {"content": "ok"}}],
+            "usage": {"completion_tokens": 1},
+        }))
+        
+        response = self.run_async(self.client.send_prompt(self.model, "Привет"))
+        
+        self.assertTrue(response.success)
+        self.assertEqual(response.content, "ok")
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(self.requests[0].headers["Authorization"], "Bearer test-key")
+    
+    def test_send_prompt_cached(self):
+        """Тест повторного промпта: ответ берётся из кэша без запроса."""
+        self.serve(lambda request: httpx.Response(200, json={
+            "choices": [{"message": {"content": "ok"}}],
+        }))
+        
+        first = self.run_async(self.client.send_prompt(self.model, "Повтор"))
+        second = self.run_async(self.client.send_prompt(self.model, "Повтор"))
+        
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(len(self.requests), 1)
+    
+    def test_send_without_response_cache(self):
+        """Тест отключённого кэша: повторная отправка снова идёт в API."""
+        self.serve(lambda request: httpx.Response(200, json={
+            "choices": [{"message": {"content": "ok"}}],
+        }))
+        # Тот же общий клиент, что возьмёт send_to_multiple_models (таймаут 30)
+        network.get_llm_client(30, False).set_custom_api_key("test-key")
+        self.addCleanup(network.get_llm_client.cache_clear)
+        
+        for _ in range(2):
+            responses = self.run_async(network.send_to_multiple_models(
+                [self.model], "Без кэша", cache_enabled=False
+            ))
+            self.assertTrue(responses[self.model.id].success)
+        
+        self.assertEqual(len(self.requests), 2)
+    
+    def test_send_prompt_http_error(self):
+        """Тест ошибки HTTP: в тексте ошибки код и начало тела ответа."""
+        self.serve(lambda request: httpx.Response(500, text="сбой сервера"))
+        
+        response = self.run_async(self.client.send_prompt(self.model, "Привет"))
         
-        found = any(p.id == prompt_id for p in results)
-        self.assertTrue(found)
+        self.assertFalse(response.success)
+        self.assertEqual(response.error, "HTTP 500: сбой сервера")
+    
+    def test_send_prompt_streaming(self):
+        """Тест потокового ответа: фрагменты SSE собираются в один текст."""
+        events = (
+            'data: {"choices": [{"delta": {"content": "При"}}]}\n\n'
+            ": ping\n\n"
+            'data: {"choices": [{"delta": {"content": "вет"}}]}\n\n'
+            "data: [DONE]\n\n"
+        )
+        self.serve(lambda request: httpx.Response(200, content=events.encode()))
+        parts = []
         
-        # Фильтруем с датой в прошлом (не должен найти)
-        old_date = today - timedelta(days=30)
-        older_date = today - timedelta(days=31)
-        results_old = db.get_all_prompts(
-            date_from=older_date.isoformat(),
-            date_to=old_date.isoformat()
+        response = self.run_async(
+            self.client.send_prompt_streaming(self.model, "Привет", parts.append)
         )
         
-        found_old = any(p.id == prompt_id for p in results_old)
-        self.assertFalse(found_old)
+        self.assertTrue(response.success)
+        self.assertEqual(response.content, "Привет")
+        self.assertEqual("".join(parts), "Привет")
+
+
+class TestHttpClientLoops(unittest.TestCase):
+    """Тесты общего httpx-клиента при запросах из разных циклов событий."""
+    
+    def setUp(self):
+        saved = (network._http_client, network._http_client_loop)
+        network._http_client = network._http_client_loop = None
         
-        db.delete_prompt(prompt_id)
+        def restore():
+            network._http_client, network._http_client_loop = saved
+        
+        self.addCleanup(restore)
+        self.addCleanup(network.shutdown)
+    
+    def test_replaced_client_closed(self):
+        """Тест смены цикла: прежний клиент закрывается в своём цикле."""
+        async def current_client():
+            return network.get_http_client()
+        
+        old = network.run_coroutine(current_client()).result(5)
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        new = loop.run_until_complete(current_client())
+        self.addCleanup(loop.run_until_complete, new.aclose())
+        
+        # aclose() запланирован в сетевом цикле - дожидаемся его выполнения
+        for _ in range(100):
+            if old.is_closed:
+                break
+            time.sleep(0.01)
+        
+        self.assertIsNot(new, old)
+        self.assertTrue(old.is_closed)
+        self.assertFalse(new.is_closed)
 
 
 class TestModelsDataclass(unittest.TestCase):
     """Тесты dataclass моделей."""
     
-    def test_prompt_defaults(self):
-        """Тест значений по умолчанию Prompt."""
-        prompt = Prompt(text="Test")
-        
-        self.assertIsNone(prompt.id)
-        self.assertEqual(prompt.text, "Test")
-        self.assertEqual(prompt.author, "user")
-        self.assertIsNotNone(prompt.created_at)
-    
-    def test_model_defaults(self):
-        """Тест значений по умолчанию Model."""
-        model = Model()
-        
-        self.assertIsNone(model.id)
-        self.assertEqual(model.name, "")
-        self.assertEqual(model.api_url, "")
-        self.assertEqual(model.api_id, "")
-        self.assertTrue(model.is_active)
+    # (название, фабрика объекта, ожидаемые значения полей по умолчанию)
+    DEFAULTS = [
+        ("Prompt", lambda: Prompt(text="Test"), {
+            "id": None, "text": "Test", "author": "user",
+        }),
+        ("Model", Model, {
+            "id": None, "name": "", "api_url": "", "api_id": "", "is_active": True,
+        }),
+        ("Result", lambda: Result(prompt_id=1, model_id=1), {
+            "id": None, "prompt_id": 1, "model_id": 1,
+            "response_text": "", "is_selected": False,
+        }),
+        ("Settings", Settings, {
+            "theme": "dark", "default_author": "user", "request_timeout": 30,
+        }),
+    ]
     
-    def test_result_defaults(self):
-        """Тест значений по умолчанию Result."""
-        result = Result(prompt_id=1, model_id=1)
-        
-        self.assertIsNone(result.id)
-        self.assertEqual(result.prompt_id, 1)
-        self.assertEqual(result.model_id, 1)
-        self.assertEqual(result.response_text, "")
-        self.assertFalse(result.is_selected)
-        self.assertIsNotNone(result.created_at)
+    def test_defaults(self):
+        """Тест значений по умолчанию всех dataclass."""
+        for name, factory, expected in self.DEFAULTS:
+            obj = factory()
+            for field, value in expected.items():
+                with self.subTest(cls=name, field=field):
+                    self.assertEqual(getattr(obj, field), value)
     
-    def test_settings_defaults(self):
-        """Тест значений по умолчанию Settings."""
-        settings = Settings()
-        
-        self.assertEqual(settings.theme, "dark")
-        self.assertEqual(settings.default_author, "user")
-        self.assertEqual(settings.request_timeout, 30)
+    def test_created_at_defaults(self):
+        """Тест заполнения created_at при создании Prompt и Result."""
+        for obj in (Prompt(text="Test"), Result(prompt_id=1, model_id=1)):
+            with self.subTest(cls=type(obj).__name__):
+                self.assertIsNotNone(obj.created_at)
 
 
 def run_tests():
     """Запуск всех тестов."""
-    # Создаём загрузчик тестов
-    loader = unittest.TestLoader()
-    suite = unittest.TestSuite()
-    
-    # Добавляем тесты
-    suite.addTests(loader.loadTestsFromTestCase(TestPromptsCRUD))
-    suite.addTests(loader.loadTestsFromTestCase(TestModelsCRUD))
-    suite.addTests(loader.loadTestsFromTestCase(TestResultsCRUD))
-    suite.addTests(loader.loadTestsFromTestCase(TestSettingsCRUD))
-    suite.addTests(loader.loadTestsFromTestCase(TestDateFilter))
-    suite.addTests(loader.loadTestsFromTestCase(TestModelsDataclass))
+    # Все классы тестов модуля: новые не нужно добавлять вручную
+    suite = unittest.TestLoader().loadTestsFromModule(sys.modules[__name__])
     
     # Запускаем с подробным выводом
     runner = unittest.TextTestRunner(verbosity=2)